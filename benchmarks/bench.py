@@ -0,0 +1,138 @@
+from argparse import ArgumentParser
+from json import dump, dumps, load
+from os import environ, path
+from platform import python_version
+from shutil import rmtree
+from statistics import median
+from subprocess import run
+from sys import path as sys_path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from server import configure, start_server
+
+ROOT = path.dirname(path.dirname(path.abspath(__file__)))
+PAGE_SIZES = (12, 100, 1000, 2000)
+
+
+def measure(func, runs, setup=None):
+    timings = list()
+    for _ in range(runs):
+        if setup:
+            setup()
+        start = perf_counter()
+        func()
+        timings.append(perf_counter() - start)
+    return {"median": median(timings), "min": min(timings), "runs": runs}
+
+
+def commit():
+    git = run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    return git.stdout.strip() or None
+
+
+def write_config(filename, base, library, episodes):
+    with open(path.join(ROOT, "saturno", "config.json")) as file:
+        config = load(file)
+    config["site"] = base
+    config["path"] = library
+    config["anime"] = [
+        {
+            "name": f"Bench {kind}",
+            "site": f"{base}/anime/bench-{kind}-{episodes}?kind={kind}",
+            "season": "1",
+            "folder": f"bench-{kind}",
+            "mode": "full",
+        }
+        for kind in ("mp4", "hls")
+    ]
+    with open(filename, "w") as file:
+        dump(config, file, indent=4)
+
+
+def print_results(results, previous=None):
+    for name, result in results.get("benchmarks").items():
+        line = f"{name:<36} {result.get('median') * 1000:>10.1f} ms"
+        if previous and (old := previous.get("benchmarks").get(name)):
+            line += f"  x{result.get('median') / old.get('median'):.2f}"
+        print(line)
+
+
+def argparsing():
+    parser = ArgumentParser(description="Offline Saturno benchmarks")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--bandwidth", type=float, default=None, help="bytes/s")
+    parser.add_argument("--video-mb", type=float, default=4)
+    parser.add_argument("--episodes", type=int, default=3)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--compare", help="previous results JSON file")
+    return parser.parse_args()
+
+
+def main():
+    args = argparsing()
+    configure(
+        latency=args.latency_ms / 1000,
+        bandwidth=args.bandwidth,
+        video_size=int(args.video_mb * 1024 * 1024),
+    )
+    server, base = start_server()
+    tmp = TemporaryDirectory()
+    library = path.join(tmp.name, "library")
+    environ["XDG_CACHE_HOME"] = path.join(tmp.name, "cache")
+    environ["SATURNO_CONFIG"] = path.join(tmp.name, "config.json")
+    write_config(environ.get("SATURNO_CONFIG"), base, library, args.episodes)
+    sys_path.insert(0, ROOT)
+
+    from saturno.anime import get_download_link, get_episodes_link, search_anime
+    from saturno.cache import configure as configure_cache
+    from saturno.catalog import CATALOG
+    from saturno.saturno import download
+
+    configure_cache(enabled=False)
+    benchmarks = {
+        "search_anime": measure(lambda: search_anime(base, "bench"), args.runs)
+    }
+    for size in PAGE_SIZES:
+        anime_link = f"{base}/anime/bench-{size}"
+        benchmarks[f"get_episodes_link[{size}]"] = measure(
+            lambda: get_episodes_link(anime_link),
+            args.runs,
+            setup=lambda: CATALOG.load().clear(),
+        )
+        benchmarks[f"get_episodes_link[{size}, unchanged]"] = measure(
+            lambda: get_episodes_link(anime_link), args.runs
+        )
+    benchmarks["get_download_link"] = measure(
+        lambda: get_download_link(f"{base}/ep/bench-ep-1?kind=mp4"), args.runs
+    )
+    benchmarks["download(run)"] = measure(
+        lambda: download("run"),
+        args.runs,
+        setup=lambda: (rmtree(library, ignore_errors=True), CATALOG.load().clear()),
+    )
+    downloaded = 2 * args.episodes * args.video_mb * 1024 * 1024
+    results = {
+        "commit": commit(),
+        "python": python_version(),
+        "settings": vars(args),
+        "benchmarks": benchmarks,
+        "download-throughput": downloaded / benchmarks["download(run)"]["median"],
+    }
+    previous = None
+    if args.compare:
+        with open(args.compare) as file:
+            previous = load(file)
+    print_results(results, previous)
+    if args.output:
+        with open(args.output, "w") as file:
+            dump(results, file, indent=4)
+    else:
+        print(dumps(results, indent=4))
+    server.shutdown()
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+from argparse import ArgumentParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from re import fullmatch
+from threading import Thread
+from time import sleep
+from urllib.parse import parse_qs, urlparse
+
+SETTINGS = {
+    "latency": 0.0,
+    "bandwidth": None,
+    "video-size": 4 * 1024 * 1024,
+    "segments": 20,
+}
+CHUNK = 64 * 1024
+
+
+# ---- Fixtures
+
+
+def search_page(base, query, results=10):
+    groups = "".join(
+        f'<ul class="list-group"><li class="list-group-item">'
+        f"<h3> {query.title()} {i} </h3>"
+        f'<a href="{base}/anime/{query}-{i}-{12 * (i + 1)}">Scheda</a>'
+        f"</li></ul>"
+        for i in range(results)
+    )
+    return f"<html><body><div class='container'>{groups}</div></body></html>"
+
+
+def anime_page(base, slug, episodes, kind):
+    links = "".join(
+        f'<a href="{base}/ep/{slug}-ep-{ep}?kind={kind}" class="btn">Episodio {ep}</a>'
+        for ep in range(1, episodes + 1)
+    )
+    noise = "".join(
+        f"<div class='row'><p>Lorem ipsum {i}</p><img src='/img/{i}.jpg'></div>"
+        for i in range(200)
+    )
+    return (
+        f"<html><head><title>{slug}</title></head><body>{noise}"
+        f"<div class='tab-content'><div class='tab-pane'>{links}</div></div>"
+        f"{noise}</body></html>"
+    )
+
+
+def episode_page(base, slug, kind):
+    return (
+        "<html><body><div class='card'><div class='card-body'>"
+        f'<a href="{base}/watch?file={slug}&kind={kind}">Guarda</a>'
+        "</div></div></body></html>"
+    )
+
+
+def watch_page(base, slug, kind):
+    source = f"{base}/stream/{slug}.{'m3u8' if kind == 'hls' else 'mp4'}"
+    return (
+        "<html><body><video controls></video>"
+        f'<script>var player = {{file: "{source}", autoplay: false}};</script>'
+        "</body></html>"
+    )
+
+
+def master_playlist(slug):
+    return (
+        "#EXTM3U\n"
+        "#EXT-X-STREAM-INF:BANDWIDTH=800000,RESOLUTION=640x360\n"
+        f"{slug}/360/index.m3u8\n"
+        "#EXT-X-STREAM-INF:BANDWIDTH=2800000,RESOLUTION=1280x720\n"
+        f"{slug}/720/index.m3u8\n"
+    )
+
+
+def media_playlist():
+    segments = "".join(
+        f"#EXTINF:10.0,\nseg-{i}.ts\n" for i in range(SETTINGS.get("segments"))
+    )
+    return f"#EXTM3U\n#EXT-X-TARGETDURATION:10\n{segments}#EXT-X-ENDLIST\n"
+
+
+def video_bytes(start, end):
+    pattern = bytes(range(256)) * (CHUNK // 256)
+    position = start
+    while position <= end:
+        offset = position % CHUNK
+        size = min(CHUNK - offset, end - position + 1)
+        yield pattern[offset : offset + size]
+        position += size
+
+
+# ---- Server
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def base(self):
+        return f"http://{self.headers.get('Host')}"
+
+    def do_HEAD(self):
+        self.handle_request(body=False)
+
+    def do_GET(self):
+        self.handle_request(body=True)
+
+    def handle_request(self, body):
+        sleep(SETTINGS.get("latency"))
+        url = urlparse(self.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        base = self.base()
+        kind = query.get("kind", "mp4")
+        if url.path == "/animelist":
+            return self.send_text(search_page(base, query.get("search", "")), body)
+        if match := fullmatch(r"/anime/(.+)-(\d+)", url.path):
+            slug, episodes = match.group(1), int(match.group(2))
+            return self.send_text(anime_page(base, slug, episodes, kind), body)
+        if match := fullmatch(r"/ep/(.+)", url.path):
+            return self.send_text(episode_page(base, match.group(1), kind), body)
+        if url.path == "/watch":
+            return self.send_text(watch_page(base, query.get("file"), kind), body)
+        if match := fullmatch(r"/stream/([^/]+)\.m3u8", url.path):
+            return self.send_text(master_playlist(match.group(1)), body)
+        if fullmatch(r"/stream/.+/index\.m3u8", url.path):
+            return self.send_text(media_playlist(), body)
+        if fullmatch(r"/stream/.+/seg-\d+\.ts", url.path):
+            size = SETTINGS.get("video-size") // SETTINGS.get("segments")
+            return self.send_video(size, body, ranges=False)
+        if fullmatch(r"/stream/.+\.mp4", url.path):
+            return self.send_video(SETTINGS.get("video-size"), body, ranges=True)
+        self.send_error(404)
+
+    def send_text(self, text, body):
+        data = text.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if body:
+            self.throttled_write([data])
+
+    def send_video(self, size, body, ranges):
+        start, end = 0, size - 1
+        requested = self.headers.get("Range")
+        if ranges and (match := fullmatch(r"bytes=(\d+)-(\d*)", requested or "")):
+            start = int(match.group(1))
+            end = min(int(match.group(2) or end), end)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+        else:
+            self.send_response(200)
+        if ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(end - start + 1))
+        self.end_headers()
+        if body:
+            self.throttled_write(video_bytes(start, end))
+
+    def throttled_write(self, chunks):
+        bandwidth = SETTINGS.get("bandwidth")
+        for data in chunks:
+            self.wfile.write(data)
+            if bandwidth:
+                sleep(len(data) / bandwidth)
+
+
+def configure(latency=None, bandwidth=None, video_size=None, segments=None):
+    new = {
+        "latency": latency,
+        "bandwidth": bandwidth,
+        "video-size": video_size,
+        "segments": segments,
+    }
+    SETTINGS.update({k: v for k, v in new.items() if v is not None})
+
+
+def start_server(port=0, background=True):
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    if background:
+        Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def argparsing():
+    parser = ArgumentParser(description="Local stand-in AnimeSaturn server")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--bandwidth", type=float, default=None, help="bytes/s")
+    parser.add_argument("--video-mb", type=float, default=4)
+    return parser.parse_args()
+
+
+def main():
+    args = argparsing()
+    configure(
+        latency=args.latency_ms / 1000,
+        bandwidth=args.bandwidth,
+        video_size=int(args.video_mb * 1024 * 1024),
+    )
+    server, base = start_server(args.port, background=False)
+    print(f"Serving on {base}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
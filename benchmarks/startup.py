@@ -0,0 +1,64 @@
+from argparse import ArgumentParser
+from json import dumps, loads
+from statistics import median
+from subprocess import run
+from sys import executable, exit
+from time import perf_counter
+
+HEAVY_MODULES = (
+    "apscheduler",
+    "bs4",
+    "emoji",
+    "halo",
+    "lxml",
+    "requests",
+    "telegram",
+    "youtube_dl",
+)
+
+IMPORT_CHECK = """
+import json, sys
+import saturno.saturno
+print(json.dumps(sorted({module.split(".")[0] for module in sys.modules})))
+"""
+
+
+def timed(command, runs):
+    timings = list()
+    for _ in range(runs):
+        start = perf_counter()
+        run(command, check=True, capture_output=True)
+        timings.append((perf_counter() - start) * 1000)
+    return median(timings)
+
+
+def argparsing():
+    parser = ArgumentParser(description="Saturno CLI startup benchmark")
+    parser.add_argument("--runs", type=int, default=10, help="runs per command")
+    parser.add_argument(
+        "--max-ms", type=float, default=None, help="fail above this median"
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = argparsing()
+    check = run([executable, "-c", IMPORT_CHECK], check=True, capture_output=True)
+    heavy = sorted(set(loads(check.stdout)) & set(HEAVY_MODULES))
+    results = {
+        "baseline": timed([executable, "-c", "pass"], args.runs),
+        "import": timed([executable, "-c", "import saturno.saturno"], args.runs),
+        "help": timed([executable, "-m", "saturno.saturno", "--help"], args.runs),
+        "heavy-modules": heavy,
+    }
+    print(dumps(results, indent=4))
+    if heavy:
+        print(f"Heavy modules imported at startup: {', '.join(heavy)}")
+        exit(1)
+    if args.max_ms and max(results.get("import"), results.get("help")) > args.max_ms:
+        print(f"Startup slower than {args.max_ms} ms")
+        exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from threading import Condition, local
+from time import perf_counter, time
+
+from saturno.metrics import METRICS
+
+SETTINGS = {"enabled": True, "decrease": 0.5, "slow": 3, "max-pause": 300}
+THROTTLE_STATUS = (429, 503)
+CURRENT = local()
+
+
+def status_of(response):
+    return getattr(response, "status_code", None) or getattr(response, "status", None)
+
+
+def retry_after(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return 0
+    try:
+        return max(0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0, parsedate_to_datetime(value).timestamp() - time())
+    except (TypeError, ValueError):
+        return 0
+
+
+class AdaptiveLimit:
+    def __init__(self, name, maximum, minimum=1):
+        self.name = name
+        self.maximum = max(minimum, maximum)
+        self.minimum = minimum
+        self.limit = max(minimum, maximum / 2)
+        self.active = 0
+        self.latency = None
+        self.samples = 0
+        self.paused_until = 0
+        self.last_decrease = 0
+        self.backoffs = 0
+        self.last_event = None
+        self.condition = Condition()
+
+    def acquire(self):
+        with self.condition:
+            while self.active >= int(self.limit) or time() < self.paused_until:
+                self.condition.wait(max(0.05, self.paused_until - time()))
+            self.active += 1
+
+    def release(self, latency=None, failed=False):
+        with self.condition:
+            self.active -= 1
+            if failed:
+                self.decrease("error")
+            elif latency is not None:
+                self.observe(latency)
+            self.condition.notify_all()
+
+    def observe(self, latency):
+        self.samples += 1
+        if self.latency is None:
+            self.latency = latency
+        slow = self.samples > 10 and latency > SETTINGS.get("slow") * self.latency
+        self.latency = 0.9 * self.latency + 0.1 * latency
+        if slow:
+            self.decrease("slow")
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+    def decrease(self, reason, pause=0):
+        now = time()
+        if pause:
+            pause = min(pause, SETTINGS.get("max-pause"))
+            self.paused_until = max(self.paused_until, now + pause)
+        if now - self.last_decrease < max(1, self.latency or 0):
+            return
+        self.last_decrease = now
+        self.limit = max(self.minimum, self.limit * SETTINGS.get("decrease"))
+        self.backoffs += 1
+        self.last_event = f"{reason}" + (f", pause {pause:.0f}s" if pause else "")
+        METRICS.incr(f"backoff-{self.name}")
+
+    def throttled(self, response):
+        with self.condition:
+            self.decrease(str(status_of(response)), retry_after(response))
+            self.condition.notify_all()
+
+    def status(self):
+        text = f"{self.name} {self.active}/{int(self.limit)}"
+        if time() < self.paused_until:
+            text += f" paused {self.paused_until - time():.0f}s"
+        elif self.last_event:
+            text += f" ({self.last_event})"
+        return text
+
+
+LIMITS = {
+    "scrape": AdaptiveLimit("scrape", 16),
+    "download": AdaptiveLimit("download", 64),
+}
+
+
+def configure(enabled=None, scrape=None, download=None, decrease=None):
+    if enabled is not None:
+        SETTINGS["enabled"] = enabled
+    if decrease is not None:
+        SETTINGS["decrease"] = decrease
+    if scrape is not None:
+        LIMITS["scrape"] = AdaptiveLimit("scrape", scrape)
+    if download is not None:
+        LIMITS["download"] = AdaptiveLimit("download", download)
+
+
+@contextmanager
+def slot(phase):
+    limit = LIMITS.get(phase) if SETTINGS.get("enabled") else None
+    if limit is None or getattr(CURRENT, "limit", None) is not None:
+        yield
+        return
+    limit.acquire()
+    CURRENT.limit = limit
+    CURRENT.responded = None
+    start = perf_counter()
+    try:
+        yield
+    except OSError:
+        limit.release(failed=True)
+        raise
+    except BaseException:
+        limit.release()
+        raise
+    else:
+        limit.release((CURRENT.responded or perf_counter()) - start)
+    finally:
+        CURRENT.limit = None
+
+
+def responded():
+    if getattr(CURRENT, "limit", None) is not None and not CURRENT.responded:
+        CURRENT.responded = perf_counter()
+
+
+def signal(response):
+    limit = getattr(CURRENT, "limit", None)
+    if limit is not None and response is not None:
+        if status_of(response) in THROTTLE_STATUS:
+            limit.throttled(response)
+
+
+def status():
+    return ", ".join(limit.status() for limit in LIMITS.values())
+
+
+def summary():
+    return ", ".join(
+        f"{name} {int(limit.limit)} ({limit.backoffs} backoffs)"
+        for name, limit in LIMITS.items()
+    )
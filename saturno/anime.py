@@ -1,30 +1,49 @@
-from re import search
-
-from bs4 import BeautifulSoup as bs
-from requests import get
+from saturno.cache import SETTINGS, fetch, get_cache, get_links
+from saturno.catalog import CATALOG
+from saturno.metrics import METRICS, timed
+from saturno.parser import episode_list, iter_episode_links, parse_search
+from saturno.parser import parse_stream_link, parse_watch_link
 
 
+@timed("search")
 def search_anime(base_url, query):
-    soup = bs(get(f"{base_url}/animelist?search={query}").text, "html.parser")
-    return [
-        (group.find("h3").text[1:-1], group.find("a").get("href"))
-        for group in soup.findAll("ul", {"class": "list-group"})
-    ]
+    return parse_search(fetch(f"{base_url}/animelist?search={query}", "search"))
 
 
 def get_episodes_link(anime_link):
-    soup = bs(get(anime_link).text, "html.parser")
-    if not soup.find("div", {"class": "tab-content"}):
-        return None, None
-    a_refs = soup.find("div", {"class": "tab-content"}).findAll("a")
-    links = [link.get("href") for link in a_refs]
-    episodes = [int(search(r"ep-(\d+)", link.get("href")).group(1)) for link in a_refs]
-    return links, episodes
+    with METRICS.timed("anime-fetch"):
+        html = fetch(anime_link, "anime")
+    with METRICS.timed("anime-parse"):
+        return CATALOG.diff(anime_link, html)
+
+
+def count_episodes(anime_link):
+    markup = episode_list(fetch(anime_link, "anime"))
+    if markup is None:
+        return None
+    return len({episode for episode, _, _ in iter_episode_links(markup)})
 
 
+@timed("resolve")
 def get_download_link(episode_link):
-    soup = bs(get(episode_link).text, "html.parser")
-    ep_page = soup.find("div", {"class": "card-body"}).find("a").get("href")
-    ep_soup = bs(get(ep_page).text, "html.parser")
-    link = search(r"\"(.*\.(m3u8|mp4))\"", str(ep_soup))
-    return ep_page, (link.group(1) or (s := ep_soup.find("source")) and s.get("src"))
+    links = get_links() if SETTINGS.get("enabled") else None
+    if links and (cached := links.lookup(episode_link)):
+        return tuple(cached)
+    ep_page = parse_watch_link(fetch(episode_link, "episode"))
+    stream = parse_stream_link(fetch(ep_page, "episode"))
+    if links and stream:
+        links.store(episode_link, ep_page, stream)
+    return ep_page, stream
+
+
+def invalidate_download_link(episode_link):
+    if not SETTINGS.get("enabled"):
+        return
+    ep_page = get_links().invalidate(episode_link)
+    cache = get_cache()
+    if not ep_page and (entry := cache.lookup(episode_link)):
+        try:
+            ep_page = parse_watch_link(entry[-1])
+        except (AttributeError, IndexError):
+            pass
+    cache.forget(episode_link, ep_page)
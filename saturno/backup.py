@@ -0,0 +1,105 @@
+from datetime import datetime
+from gzip import compress
+from gzip import open as gzip_open
+from json import dumps, load
+from os import path, remove, scandir
+from re import search
+from threading import Lock
+
+from saturno.config import DATA_DIR
+from saturno.storage import load_json, save_json, write_atomic
+
+SETTINGS = {"directory": path.join(DATA_DIR, "backups"), "keep": 10}
+LEGACY_REGEX = r"^(\d{4}-\d{2}-\d{2})_saturno-backup\.json$"
+
+
+class BackupStore:
+    def __init__(self, directory, keep=10):
+        self.directory = directory
+        self.keep = keep
+        self.index_file = path.join(directory, "index.json")
+        self.lock = Lock()
+        self.index = None
+
+    def load(self):
+        if self.index is None:
+            self.index = load_json(self.index_file)
+            if self.index is None:
+                self.index = {"backups": list()}
+                self.import_legacy(".")
+        return self.index
+
+    def save(self):
+        save_json(self.index_file, self.index, indent=4)
+
+    def write(self, config, created):
+        name = f"{created:%Y-%m-%d_%H%M%S}_saturno-backup.json.gz"
+        write_atomic(
+            path.join(self.directory, name),
+            lambda file: file.write(compress(dumps(config).encode())),
+            mode="wb",
+        )
+        return {"file": name, "created": created.isoformat(timespec="seconds")}
+
+    def rotate(self):
+        backups = self.index.get("backups")
+        while len(backups) > max(1, self.keep):
+            try:
+                remove(path.join(self.directory, backups.pop(0).get("file")))
+            except FileNotFoundError:
+                pass
+
+    def create(self, config):
+        with self.lock:
+            backups = self.load().get("backups")
+            backup = self.write(config, datetime.now())
+            if backups and backups[-1].get("file") == backup.get("file"):
+                backups.pop()
+            backups.append(backup)
+            self.rotate()
+            self.save()
+
+    def latest(self):
+        with self.lock:
+            backups = self.load().get("backups")
+            return backups[-1] if backups else None
+
+    def restore(self, backup=None):
+        backup = backup or self.latest()
+        if not backup:
+            return None
+        with gzip_open(path.join(self.directory, backup.get("file")), "rt") as file:
+            return load(file)
+
+    def import_legacy(self, directory):
+        with scandir(directory) as entries:
+            legacy = sorted(
+                (day.group(1), entry.path)
+                for entry in entries
+                if entry.is_file() and (day := search(LEGACY_REGEX, entry.name))
+            )
+        for day, filename in legacy:
+            with open(filename) as file:
+                config = load(file)
+            created = datetime.strptime(day, "%Y-%m-%d")
+            self.index.get("backups").append(self.write(config, created))
+        if legacy:
+            self.rotate()
+            self.save()
+
+
+def configure(directory=None, keep=None):
+    if directory is not None:
+        SETTINGS["directory"] = path.expanduser(directory)
+    if keep is not None:
+        SETTINGS["keep"] = keep
+
+
+BACKUPS = None
+
+
+def get_backups():
+    global BACKUPS
+    if BACKUPS is None:
+        BACKUPS = BackupStore(SETTINGS.get("directory"), SETTINGS.get("keep"))
+    return BACKUPS
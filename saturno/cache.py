@@ -0,0 +1,195 @@
+from os import makedirs, path
+from sqlite3 import connect
+from threading import Lock
+from time import time
+
+from saturno.config import CACHE_DIR
+from saturno.metrics import METRICS
+from saturno.mirrors import get
+from saturno.throttle import throttle
+
+SETTINGS = {
+    "enabled": True,
+    "size": 64 * 1024 * 1024,
+    "ttl": {"search": 3600, "anime": 600, "episode": 86400},
+    "link-ttl": 6 * 3600,
+}
+
+
+class HttpCache:
+    def __init__(self, filename):
+        makedirs(path.dirname(filename), exist_ok=True)
+        self.lock = Lock()
+        self.db = connect(filename, timeout=30, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (url TEXT PRIMARY KEY, "
+            "etag TEXT, modified TEXT, fetched REAL, accessed REAL, "
+            "size INTEGER, body TEXT)"
+        )
+        self.db.commit()
+
+    def lookup(self, url):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT etag, modified, fetched, body FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+            if row:
+                self.db.execute(
+                    "UPDATE responses SET accessed = ? WHERE url = ?", (time(), url)
+                )
+                self.db.commit()
+            return row
+
+    def store(self, url, etag, modified, body):
+        now = time()
+        with self.lock:
+            self.db.execute(
+                "REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, modified, now, now, len(body.encode()), body),
+            )
+            self.evict()
+            self.db.commit()
+
+    def forget(self, *urls):
+        with self.lock:
+            self.db.executemany(
+                "DELETE FROM responses WHERE url = ?", [(url,) for url in urls if url]
+            )
+            self.db.commit()
+
+    def refresh(self, url):
+        with self.lock:
+            self.db.execute(
+                "UPDATE responses SET fetched = ?, accessed = ? WHERE url = ?",
+                (time(), time(), url),
+            )
+            self.db.commit()
+
+    def evict(self):
+        query = "SELECT COALESCE(SUM(size), 0) FROM responses"
+        total = self.db.execute(query).fetchone()[0]
+        if total <= SETTINGS.get("size"):
+            return
+        rows = self.db.execute(
+            "SELECT url, size FROM responses ORDER BY accessed"
+        ).fetchall()
+        to_delete = list()
+        for url, size in rows:
+            if total <= SETTINGS.get("size"):
+                break
+            to_delete.append((url,))
+            total -= size
+        self.db.executemany("DELETE FROM responses WHERE url = ?", to_delete)
+
+
+class LinkCache:
+    def __init__(self, filename):
+        makedirs(path.dirname(filename), exist_ok=True)
+        self.lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.db = connect(filename, timeout=30, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS links (link TEXT PRIMARY KEY, "
+            "ep_page TEXT, stream TEXT, expires REAL)"
+        )
+        self.db.commit()
+
+    def lookup(self, link):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT ep_page, stream FROM links WHERE link = ? AND expires > ?",
+                (link, time()),
+            ).fetchone()
+            if row:
+                self.hits += 1
+                METRICS.incr("link-hit")
+            else:
+                self.misses += 1
+                METRICS.incr("link-miss")
+            return row
+
+    def store(self, link, ep_page, stream):
+        with self.lock:
+            self.db.execute(
+                "REPLACE INTO links VALUES (?, ?, ?, ?)",
+                (link, ep_page, stream, time() + SETTINGS.get("link-ttl")),
+            )
+            self.db.execute("DELETE FROM links WHERE expires <= ?", (time(),))
+            self.db.commit()
+
+    def invalidate(self, link):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT ep_page FROM links WHERE link = ?", (link,)
+            ).fetchone()
+            self.db.execute("DELETE FROM links WHERE link = ?", (link,))
+            self.db.commit()
+            return row[0] if row else None
+
+
+CACHE = None
+LINKS = None
+CACHE_LOCK = Lock()
+
+
+def configure(enabled=None, size=None, ttl=None, link_ttl=None):
+    if link_ttl is not None:
+        SETTINGS["link-ttl"] = link_ttl
+    if enabled is not None:
+        SETTINGS["enabled"] = enabled
+    if size is not None:
+        SETTINGS["size"] = size
+    if ttl is not None:
+        SETTINGS["ttl"] = {**SETTINGS.get("ttl"), **ttl}
+
+
+def get_cache():
+    global CACHE
+    with CACHE_LOCK:
+        if CACHE is None:
+            CACHE = HttpCache(path.join(CACHE_DIR, "http.sqlite"))
+        return CACHE
+
+
+def get_links():
+    global LINKS
+    with CACHE_LOCK:
+        if LINKS is None:
+            LINKS = LinkCache(path.join(CACHE_DIR, "http.sqlite"))
+        return LINKS
+
+
+def fetch(url, kind=None):
+    if not SETTINGS.get("enabled"):
+        response = get(url)
+        throttle(len(response.content), "scrape")
+        return response.text
+    cache = get_cache()
+    entry = cache.lookup(url)
+    headers = dict()
+    if entry:
+        etag, modified, fetched, body = entry
+        if time() - fetched < SETTINGS.get("ttl").get(kind, 0):
+            METRICS.incr("cache-hit")
+            return body
+        if etag:
+            headers["If-None-Match"] = etag
+        if modified:
+            headers["If-Modified-Since"] = modified
+    response = get(url, headers=headers)
+    throttle(len(response.content), "scrape")
+    if entry and response.status_code == 304:
+        METRICS.incr("cache-revalidated")
+        cache.refresh(url)
+        return body
+    METRICS.incr("cache-miss")
+    if response.status_code == 200:
+        cache.store(
+            url,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+            response.text,
+        )
+    return response.text
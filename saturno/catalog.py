@@ -0,0 +1,63 @@
+from hashlib import sha1
+from os import path
+
+from saturno.config import CACHE_DIR
+from saturno.metrics import METRICS
+from saturno.parser import episode_list, iter_episode_links
+from saturno.storage import JsonIndex
+
+
+def digest(markup):
+    return sha1(markup.encode()).hexdigest()
+
+
+class CatalogIndex(JsonIndex):
+    def __init__(self, filename):
+        super().__init__(filename)
+        self.arrivals = dict()
+
+    def entry(self, anime_link):
+        with self.lock:
+            return self.load().get(anime_link)
+
+    def diff(self, anime_link, html):
+        markup = episode_list(html)
+        if markup is None:
+            return None
+        fingerprint = digest(markup)
+        entry = self.entry(anime_link)
+        if entry and entry.get("fingerprint") == fingerprint:
+            METRICS.incr("catalog-unchanged")
+            return episode_map(entry)
+        episodes, known = dict(), 0
+        if entry and digest(markup[: entry.get("known")]) == entry.get("known-hash"):
+            METRICS.incr("catalog-incremental")
+            episodes, known = episode_map(entry), entry.get("known")
+        high_water = max(episodes, default=0)
+        for episode, link, end in iter_episode_links(markup, known):
+            episodes.setdefault(episode, link)
+            if episode >= high_water:
+                high_water, known = episode, end
+        with self.lock:
+            if entry:
+                arrived = len(episodes.keys() - episode_map(entry).keys())
+                self.arrivals[anime_link] = self.arrivals.get(anime_link, 0) + arrived
+            self.load()[anime_link] = {
+                "fingerprint": fingerprint,
+                "known": known,
+                "known-hash": digest(markup[:known]),
+                "episodes": episodes,
+            }
+            self.save()
+        return episodes
+
+    def take_arrivals(self, anime_link):
+        with self.lock:
+            return self.arrivals.pop(anime_link, 0)
+
+
+def episode_map(entry):
+    return {int(episode): link for episode, link in entry.get("episodes").items()}
+
+
+CATALOG = CatalogIndex(path.join(CACHE_DIR, "catalog.json"))
@@ -0,0 +1,66 @@
+from contextlib import contextmanager
+from json import load
+from os import environ, path, stat
+from threading import RLock
+
+from saturno.storage import save_json
+
+CONFIG_FILE = environ.get(
+    "SATURNO_CONFIG", path.join(path.abspath(path.dirname(__file__)), "config.json")
+)
+CACHE_DIR = path.join(
+    environ.get("XDG_CACHE_HOME", path.join(path.expanduser("~"), ".cache")), "saturno"
+)
+DATA_DIR = path.join(
+    environ.get("XDG_DATA_HOME", path.join(path.expanduser("~"), ".local", "share")),
+    "saturno",
+)
+
+
+class ConfigStore:
+    def __init__(self, filename):
+        self.filename = filename
+        self.lock = RLock()
+        self.config = None
+        self.mtime = None
+        self.batching = 0
+
+    def load(self):
+        with self.lock:
+            if self.batching and self.config is not None:
+                return self.config
+            mtime = stat(self.filename).st_mtime_ns
+            if self.config is None or mtime != self.mtime:
+                with open(self.filename) as file:
+                    self.config = load(file)
+                self.mtime = mtime
+            return self.config
+
+    def get(self, key, default=None):
+        return self.load().get(key, default)
+
+    def __getitem__(self, key):
+        return self.load()[key]
+
+    def save(self, config=None):
+        with self.lock:
+            if config is not None:
+                self.config = config
+            if self.batching:
+                return
+            save_json(self.filename, self.config, durable=True, indent=4)
+            self.mtime = stat(self.filename).st_mtime_ns
+
+    @contextmanager
+    def batch(self):
+        with self.lock:
+            config = self.load()
+            self.batching += 1
+            try:
+                yield config
+            finally:
+                self.batching -= 1
+            self.save()
+
+
+STORE = ConfigStore(CONFIG_FILE)
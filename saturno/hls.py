@@ -0,0 +1,107 @@
+from concurrent.futures import ThreadPoolExecutor
+from os import path
+from re import findall, search
+from urllib.parse import urljoin
+
+from saturno.adaptive import slot
+from saturno.progress import complete, load_progress, part_name, save_progress
+from saturno.session import get
+from saturno.throttle import throttle
+
+
+class HlsUnsupported(Exception):
+    pass
+
+
+def parse_attributes(line):
+    return {
+        key: value.strip('"')
+        for key, value in findall(r"([A-Z0-9-]+)=(\"[^\"]*\"|[^,]*)", line)
+    }
+
+
+def parse_playlist(text, base_url):
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines or lines[0] != "#EXTM3U":
+        raise HlsUnsupported("Not an HLS playlist")
+    variants, segments = list(), list()
+    for i, line in enumerate(lines):
+        if line.startswith("#EXT-X-STREAM-INF") and i + 1 < len(lines):
+            attributes = parse_attributes(line.split(":", 1)[1])
+            height = search(r"x(\d+)", attributes.get("RESOLUTION", ""))
+            variants.append(
+                (
+                    int(attributes.get("BANDWIDTH", 0)),
+                    int(height.group(1)) if height else 0,
+                    urljoin(base_url, lines[i + 1]),
+                )
+            )
+        elif line.startswith("#EXT-X-KEY"):
+            if parse_attributes(line.split(":", 1)[1]).get("METHOD") != "NONE":
+                raise HlsUnsupported("Encrypted HLS stream")
+        elif line.startswith(("#EXT-X-MAP", "#EXT-X-BYTERANGE")):
+            raise HlsUnsupported("Fragmented HLS stream")
+        elif not line.startswith("#") and not lines[i - 1].startswith(
+            "#EXT-X-STREAM-INF"
+        ):
+            segments.append(urljoin(base_url, line))
+    return variants, segments
+
+
+def pick_variant(variants, quality="best"):
+    variants = sorted(variants)
+    if quality == "worst":
+        return variants[0][2]
+    if str(quality).isdigit():
+        fitting = [v for v in variants if v[1] and v[1] <= int(quality)]
+        return (fitting or variants[:1])[-1][2]
+    return variants[-1][2]
+
+
+def get_segments(url, quality="best"):
+    variants, segments = parse_playlist(get(url).text, url)
+    if variants:
+        variant = pick_variant(variants, quality)
+        _, segments = parse_playlist(get(variant).text, variant)
+    if not segments:
+        raise HlsUnsupported("Empty HLS playlist")
+    return segments
+
+
+def fetch_segment(url):
+    chunks = list()
+    with slot("download"), get(url, stream=True) as response:
+        response.raise_for_status()
+        for data in response.iter_content(64 * 1024):
+            throttle(len(data))
+            chunks.append(data)
+    return b"".join(chunks)
+
+
+def download_hls(url, filename, quality="best", workers=8):
+    segments = get_segments(url, quality)
+    progress = load_progress(filename)
+    if (
+        not progress
+        or progress.get("segments") != len(segments)
+        or not path.exists(part_name(filename))
+    ):
+        progress = {"segments": len(segments), "done": 0, "size": 0}
+    window = max(1, workers) * 2
+    with open(part_name(filename), "ab") as file:
+        file.truncate(progress.get("size"))
+        file.seek(progress.get("size"))
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            pending = list()
+            next_segment = progress.get("done")
+            while next_segment < len(segments) or pending:
+                while next_segment < len(segments) and len(pending) < window:
+                    pending.append(pool.submit(fetch_segment, segments[next_segment]))
+                    next_segment += 1
+                data = pending.pop(0).result()
+                file.write(data)
+                file.flush()
+                progress["done"] += 1
+                progress["size"] += len(data)
+                save_progress(filename, progress)
+    complete(filename)
@@ -0,0 +1,122 @@
+from os import makedirs, path
+from sqlite3 import connect
+from threading import Lock
+from time import time
+
+from saturno.config import CACHE_DIR
+
+SETTINGS = {"backoff": 15 * 60, "max-backoff": 24 * 3600, "keep": 30 * 24 * 3600}
+
+
+class Journal:
+    def __init__(self, filename):
+        makedirs(path.dirname(filename), exist_ok=True)
+        self.lock = Lock()
+        self.db = connect(filename, timeout=30, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs (key TEXT PRIMARY KEY, name TEXT, "
+            "folder TEXT, season TEXT, episode INTEGER, link TEXT, state TEXT, "
+            "attempts INTEGER DEFAULT 0, last_error TEXT, next_attempt REAL "
+            "DEFAULT 0, updated REAL)"
+        )
+        self.db.commit()
+
+    def execute(self, query, params=()):
+        with self.lock:
+            rows = self.db.execute(query, params).fetchall()
+            self.db.commit()
+            return rows
+
+    def enqueue(self, name, folder, season, episode, link):
+        self.execute(
+            "INSERT INTO jobs (key, name, folder, season, episode, link, state, "
+            "updated) VALUES (?, ?, ?, ?, ?, ?, 'queued', ?) ON CONFLICT(key) DO "
+            "UPDATE SET name = excluded.name, link = excluded.link, "
+            "state = 'queued', updated = excluded.updated",
+            (
+                job_key(folder, season, episode),
+                name,
+                folder,
+                str(season),
+                episode,
+                link,
+                time(),
+            ),
+        )
+
+    def start(self, folder, season, episode):
+        self.set_state(folder, season, episode, "in-progress")
+
+    def done(self, folder, season, episode):
+        self.set_state(folder, season, episode, "done")
+
+    def remove(self, folder, season, episode):
+        self.execute(
+            "DELETE FROM jobs WHERE key = ?", (job_key(folder, season, episode),)
+        )
+
+    def set_state(self, folder, season, episode, state):
+        self.execute(
+            "UPDATE jobs SET state = ?, updated = ? WHERE key = ?",
+            (state, time(), job_key(folder, season, episode)),
+        )
+
+    def fail(self, folder, season, episode, error):
+        key = job_key(folder, season, episode)
+        rows = self.execute("SELECT attempts FROM jobs WHERE key = ?", (key,))
+        attempts = (rows[0][0] if rows else 0) + 1
+        delay = min(
+            SETTINGS.get("backoff") * 2 ** (attempts - 1), SETTINGS.get("max-backoff")
+        )
+        self.execute(
+            "UPDATE jobs SET state = 'failed', attempts = ?, last_error = ?, "
+            "next_attempt = ?, updated = ? WHERE key = ?",
+            (attempts, str(error)[:500], time() + delay, time(), key),
+        )
+        return delay
+
+    def failed(self, folder, season, due):
+        comparison = "<=" if due else ">"
+        return {
+            episode
+            for (episode,) in self.execute(
+                "SELECT episode FROM jobs WHERE folder = ? AND season = ? AND "
+                f"state = 'failed' AND next_attempt {comparison} ?",
+                (folder, str(season), time()),
+            )
+        }
+
+    def unfinished(self):
+        return self.execute(
+            "SELECT name, folder, season, episode, link FROM jobs "
+            "WHERE state = 'in-progress' ORDER BY folder, episode"
+        )
+
+    def prune(self):
+        self.execute(
+            "DELETE FROM jobs WHERE state = 'done' AND updated < ?",
+            (time() - SETTINGS.get("keep"),),
+        )
+
+
+def job_key(folder, season, episode):
+    return f"{folder}|{season}|{episode}"
+
+
+def configure(backoff=None, max_backoff=None):
+    if backoff is not None:
+        SETTINGS["backoff"] = backoff
+    if max_backoff is not None:
+        SETTINGS["max-backoff"] = max_backoff
+
+
+JOURNAL = None
+JOURNAL_LOCK = Lock()
+
+
+def get_journal():
+    global JOURNAL
+    with JOURNAL_LOCK:
+        if JOURNAL is None:
+            JOURNAL = Journal(path.join(CACHE_DIR, "journal.sqlite"))
+        return JOURNAL
@@ -0,0 +1,144 @@
+from json import dumps, loads
+from os import O_CREAT, O_EXCL, O_WRONLY, close, fsync, getpid, makedirs
+from os import open as os_open
+from os import path, remove, rename, stat, utime, write
+from socket import gethostname
+from threading import Event, Lock, Thread
+from time import time
+from urllib.parse import quote
+from uuid import uuid4
+
+SETTINGS = {"enabled": True, "ttl": 120}
+
+
+class LeaseStore:
+    def __init__(self, directory, node=None):
+        self.directory = directory
+        self.node = node or f"{gethostname()}-{getpid()}-{uuid4().hex[:6]}"
+        self.lock = Lock()
+        self.held = set()
+        self.stop = Event()
+        self.heartbeat = None
+
+    def filename(self, key):
+        return path.join(self.directory, f"{quote(key, safe='')}.lease")
+
+    def owner(self, filename):
+        try:
+            with open(filename) as file:
+                return loads(file.read()).get("node")
+        except (OSError, ValueError):
+            return None
+
+    def now(self):
+        clock = path.join(self.directory, f".clock-{quote(gethostname(), safe='')}")
+        with open(clock, "a"):
+            pass
+        utime(clock)
+        return stat(clock).st_mtime
+
+    def expired(self, filename):
+        try:
+            return self.now() - stat(filename).st_mtime > SETTINGS.get("ttl")
+        except FileNotFoundError:
+            return True
+
+    def create(self, filename):
+        try:
+            fd = os_open(filename, O_CREAT | O_EXCL | O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        try:
+            write(fd, dumps({"node": self.node, "created": time()}).encode())
+            fsync(fd)
+        finally:
+            close(fd)
+        return True
+
+    def reclaim(self, filename):
+        stale = f"{filename}.{self.node}.stale"
+        try:
+            rename(filename, stale)
+        except FileNotFoundError:
+            return
+        if self.expired(stale):
+            remove(stale)
+        else:
+            rename(stale, filename)
+
+    def acquire(self, key):
+        makedirs(self.directory, exist_ok=True)
+        filename = self.filename(key)
+        if not self.create(filename):
+            if not self.expired(filename):
+                return False
+            self.reclaim(filename)
+            if not self.create(filename):
+                return False
+        with self.lock:
+            self.held.add(key)
+        self.start_heartbeat()
+        return True
+
+    def release(self, key):
+        with self.lock:
+            self.held.discard(key)
+        filename = self.filename(key)
+        if self.owner(filename) == self.node:
+            try:
+                remove(filename)
+            except FileNotFoundError:
+                pass
+
+    def renew(self):
+        with self.lock:
+            held = list(self.held)
+        for key in held:
+            filename = self.filename(key)
+            if self.owner(filename) == self.node:
+                utime(filename)
+            else:
+                with self.lock:
+                    self.held.discard(key)
+
+    def start_heartbeat(self):
+        with self.lock:
+            if self.heartbeat is not None:
+                return
+            self.heartbeat = Thread(target=self.beat, daemon=True)
+            self.heartbeat.start()
+
+    def beat(self):
+        while not self.stop.wait(SETTINGS.get("ttl") / 3):
+            try:
+                self.renew()
+            except OSError:
+                pass
+
+
+class NoLeases:
+    def acquire(self, key):
+        return True
+
+    def release(self, key):
+        pass
+
+
+def configure(enabled=None, ttl=None):
+    if enabled is not None:
+        SETTINGS["enabled"] = enabled
+    if ttl is not None:
+        SETTINGS["ttl"] = ttl
+
+
+LEASES = None
+LEASES_LOCK = Lock()
+
+
+def get_leases(library_path):
+    global LEASES
+    with LEASES_LOCK:
+        if LEASES is None:
+            directory = path.join(library_path, ".saturno-leases")
+            LEASES = LeaseStore(directory) if SETTINGS.get("enabled") else NoLeases()
+        return LEASES
@@ -0,0 +1,53 @@
+from os import path, scandir, stat
+from re import search
+
+from saturno.config import CACHE_DIR
+from saturno.storage import JsonIndex
+
+EPISODE_REGEX = r"_s\d+e(\d+).+(?<!part)$"
+
+
+class LibraryIndex(JsonIndex):
+    def scan(self, directory):
+        with scandir(directory) as entries:
+            return sorted(
+                int(se_ep.group(1))
+                for entry in entries
+                if entry.is_file() and (se_ep := search(EPISODE_REGEX, entry.name))
+            )
+
+    def episodes(self, directory):
+        try:
+            mtime = stat(directory).st_mtime
+        except FileNotFoundError:
+            return []
+        with self.lock:
+            entry = self.load().get(directory)
+            if entry and entry.get("mtime") == mtime:
+                return entry.get("episodes")
+            episodes = self.scan(directory)
+            self.index[directory] = {"mtime": mtime, "episodes": episodes}
+            self.save()
+            return episodes
+
+    def refresh(self, directory):
+        with self.lock:
+            self.load()
+            mtime = stat(directory).st_mtime
+            self.index[directory] = {"mtime": mtime, "episodes": self.scan(directory)}
+            self.save()
+
+    def rebuild(self, directories):
+        with self.lock:
+            self.index = dict()
+            for directory in directories:
+                if path.isdir(directory):
+                    self.index[directory] = {
+                        "mtime": stat(directory).st_mtime,
+                        "episodes": self.scan(directory),
+                    }
+            self.save()
+            return self.index
+
+
+LIBRARY = LibraryIndex(path.join(CACHE_DIR, "library.json"))
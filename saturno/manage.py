@@ -1,12 +1,19 @@
-from datetime import datetime
-from json import dump, load
-from os import path, walk
-from re import search
+from concurrent.futures import ThreadPoolExecutor, wait
+from os import path
+from re import search, sub
 
 from colorifix.colorifix import erase, paint, ppaint, sample
+from halo import Halo
 from pymortafix.utils import direct_input, strict_input
-from requests import get
-from saturno.anime import search_anime
+from saturno.anime import count_episodes, search_anime
+from saturno.backup import get_backups
+from saturno.config import STORE
+from saturno.mirrors import best_site
+from saturno.mirrors import configure as configure_mirrors
+from saturno.mirrors import site_list
+from saturno.session import get
+from saturno.throttle import parse_rate, parse_schedule
+from saturno.viewport import Viewport
 from telegram import Bot
 from telegram.error import InvalidToken
 
@@ -14,48 +21,46 @@ from telegram.error import InvalidToken
 
 
 def get_config():
-    return load(open(f"{path.abspath(path.dirname(__file__))}/config.json"))
+    return STORE.load()
 
 
 def save_config(config_dict):
-    return dump(
-        config_dict,
-        open(f"{path.abspath(path.dirname(__file__))}/config.json", "w"),
-        indent=4,
-    )
+    return STORE.save(config_dict)
 
 
 def remove_anime(index):
-    config = get_config()
-    config["anime"] = [
-        anime for i, anime in enumerate(config.get("anime")) if index != i
-    ]
-    save_config(config)
+    with STORE.batch() as config:
+        config["anime"] = [
+            anime for i, anime in enumerate(config.get("anime")) if index != i
+        ]
 
 
 def add_anime(name, link, season, folder, mode):
     new = {"name": name, "site": link, "season": season, "folder": folder, "mode": mode}
-    config = get_config()
-    config["anime"] += [new]
-    save_config(config)
+    with STORE.batch() as config:
+        config["anime"] += [new]
 
 
 def add_new_path(path):
-    config = get_config()
-    config["path"] = path
-    save_config(config)
+    with STORE.batch() as config:
+        config["path"] = path
 
 
 def add_new_site(site):
-    config = get_config()
-    config["site"] = site
-    save_config(config)
+    mirrors = [mirror.strip() for mirror in site.split(",") if mirror.strip()]
+    with STORE.batch() as config:
+        config["site"] = mirrors[0] if len(mirrors) == 1 else mirrors
+    configure_mirrors(site=mirrors)
+
+
+def add_bandwidth(default, schedule):
+    with STORE.batch() as config:
+        config["bandwidth"] = {"default": default, "schedule": schedule}
 
 
 def add_format(formating):
-    config = get_config()
-    config["format"] = formating
-    save_config(config)
+    with STORE.batch() as config:
+        config["format"] = formating
 
 
 def is_folder_unique(folder_name):
@@ -64,10 +69,9 @@ def is_folder_unique(folder_name):
 
 
 def add_telegram_config(bot_token, chat_id):
-    config = get_config()
-    config["telegram-bot-token"] = bot_token
-    config["telegram-chat-id"] = chat_id
-    save_config(config)
+    with STORE.batch() as config:
+        config["telegram-bot-token"] = bot_token
+        config["telegram-chat-id"] = chat_id
 
 
 def add_colors(colors):
@@ -82,9 +86,8 @@ def add_colors(colors):
         "button",
     ]
     colors_save = {k: c for k, c in zip(json_labels, colors)}
-    config = get_config()
-    config["colors"] = colors_save
-    save_config(config)
+    with STORE.batch() as config:
+        config["colors"] = colors_save
 
 
 # ---- Pretty Print
@@ -99,17 +102,6 @@ def pprint_row(anime_name, season, mode, index=False, remove=False):
     return ret_str + paint(f" [#{c_season_menu}](s{season}) [#{c_mode_menu}][{mode}]")
 
 
-def pprint_anime(anime_list, index, remove=None):
-    if not anime_list:
-        return "No anime added.."
-    return "\n".join(
-        [
-            pprint_row(name, season, mode, index == i, remove=remove)
-            for i, (name, _, season, _, mode) in enumerate(anime_list)
-        ]
-    )
-
-
 def pprint_actions(mode=None):
     if mode == "confirm":
         actions = {"y": "confirm", "b": "back"}
@@ -124,13 +116,18 @@ def pprint_actions(mode=None):
             "p": "path",
             "s": "site",
             "f": "format",
+            "l": "bandwidth",
             "t": "telegram",
             "c": "colors",
             "b": "back",
         }
+    elif mode == "filter":
+        actions = {"enter": "done", "esc": "clear"}
     else:
         actions = {
             "ws": "move",
+            "np": "page",
+            "f": "filter",
             "a": "add",
             "r": "remove",
             "e": "settings",
@@ -148,19 +145,42 @@ def pprint_actions(mode=None):
 
 def pprint_query(query_list, selected):
     return "\n".join(
-        paint(f"[#{c_anime_menu}][>] {name}") if selected == i else f"[ ] {name}"
-        for i, (name, _) in enumerate(query_list)
+        (
+            paint(f"[#{c_anime_menu}][>] {name}")
+            if selected == i
+            else f"[ ] {name}"
+        )
+        + paint(f" [#{c_season_menu}]{pprint_episodes(url)}")
+        for i, (name, url) in enumerate(query_list)
     )
 
 
+def pprint_episodes(url):
+    future = PREFETCH.get(url)
+    if future is None or not future.done():
+        return "(...)"
+    if future.exception() or future.result() is None:
+        return "(unavailable)"
+    return f"({future.result()} eps)"
+
+
 def pprint_settings():
     config = get_config()
-    labels = ("Current path", "Site", "Format", "Backup", "Telegram")
+    labels = ("Current path", "Site", "Format", "Bandwidth", "Backup", "Telegram")
     fmt_str = paint(f"[#{c_settings}]{config.get('format')}")
     path_str = paint(f"[#{c_settings}]{config.get('path')}")
-    site_str = paint(f"[#{c_settings}]{config.get('site')}")
-    backup = get_last_backup()
-    backup_str = paint(f"[#{c_settings}]{backup}")
+    site_str = paint(f"[#{c_settings}]{', '.join(site_list(config.get('site')))}")
+    bandwidth = config.get("bandwidth", dict())
+    schedule = ", ".join(
+        f"{p.get('from')}-{p.get('to')}={p.get('rate')}"
+        for p in bandwidth.get("schedule", list())
+    )
+    bandwidth_str = paint(
+        f"[#{c_settings}]{bandwidth.get('default') or 'unlimited'}"
+        + (f"[/] ({schedule})" if schedule else "")
+    )
+    backup = get_backups().latest()
+    backup_str = paint(f"[#{c_settings}]{backup.get('created') if backup else ''}")
     telegram_str = (
         paint(
             f"[#{c_settings}]{config.get('telegram-bot-token')}[/# @bold]:"
@@ -169,40 +189,172 @@ def pprint_settings():
         if config.get("telegram-bot-token")
         else ""
     )
-    values = (path_str, site_str, fmt_str, backup_str, telegram_str)
+    values = (path_str, site_str, fmt_str, bandwidth_str, backup_str, telegram_str)
     return "\n".join(
         paint(f"[@bold]{lab}:[/@] {val}") for lab, val in zip(labels, values)
     )
 
 
-def get_last_backup():
-    _, _, files = list(walk("."))[0]
-    backups = sorted(
-        [file for file in files if search(r"saturno-backup\.json$", file)], reverse=True
-    )
-    return backups[0] if backups else ""
-
-
 def recap_new_anime(name, url, season, folder, mode):
     return paint(
         f"Name: [#{c_settings}]{name}[/]\n"
         f"Link: [#{c_settings}]{url}[/]\n"
+        f"Episodes: [#{c_settings}]{pprint_episodes(url)[1:-1]}[/]\n"
         f"Stagione [#{c_settings}]{season}[/]\n"
         f"Folder: [#{c_settings}]{folder}[/]\n"
         f"Mode: [#{c_settings}]{mode}[/]"
     )
 
 
+# ---- Anime list
+
+
+class AnimeView:
+    def __init__(self):
+        self.viewport = Viewport()
+        self.version = None
+        self.rows = list()
+        self.rows_cache = dict()
+        self.query = ""
+        self.matches = list()
+        self.index = 0
+
+    def load(self):
+        anime_list = get_config().get("anime")
+        if STORE.mtime == self.version:
+            return
+        self.version = STORE.mtime
+        self.rows = [
+            (anime.get("name"), anime.get("season"), anime.get("mode"))
+            for anime in anime_list
+        ]
+        self.rows_cache.clear()
+        self.filter(self.query, narrow=False)
+
+    def filter(self, query, narrow=True):
+        query = query.lower()
+        candidates = (
+            self.matches
+            if narrow and self.query and query.startswith(self.query)
+            else range(len(self.rows))
+        )
+        self.matches = [i for i in candidates if query in self.rows[i][0].lower()]
+        self.query = query
+        self.index = min(self.index, max(0, len(self.matches) - 1))
+
+    def selected(self):
+        return self.matches[self.index] if self.matches else None
+
+    def move(self, step):
+        self.index = max(0, min(len(self.matches) - 1, self.index + step))
+
+    def row(self, position, remove=False):
+        i = self.matches[position]
+        key = (i, position == self.index, remove)
+        if key not in self.rows_cache:
+            self.rows_cache[key] = pprint_row(*self.rows[i], key[1], remove=remove)
+        return self.rows_cache.get(key)
+
+    def render(self, mode=None, remove=False):
+        if not self.rows:
+            lines = ["No anime added.."]
+        elif not self.matches:
+            lines = [paint(f"No anime matching [#blue]{self.query}[/]")]
+        else:
+            window = self.viewport.window(self.index, len(self.matches))
+            lines = [self.row(position, remove) for position in window]
+        status = list()
+        if len(self.matches) > len(lines) or self.query:
+            status.append(f"{self.index + 1}/{len(self.matches)}")
+        if self.query or mode == "filter":
+            status.append(paint(f"filter: [#blue]{self.query}[/]"))
+        if status:
+            lines.append(" ".join(status))
+        lines.extend(pprint_actions(mode=mode).split("\n"))
+        self.viewport.draw(lines)
+
+    def clear(self):
+        self.viewport.clear()
+
+    def read_filter(self):
+        query = self.query
+        while True:
+            self.render(mode="filter")
+            key = direct_input()
+            if key in ("\r", "\n"):
+                return
+            if key == "\x1b":
+                query = ""
+            elif key in ("\x7f", "\x08"):
+                query = query[:-1]
+            elif key.isprintable():
+                query += key
+            self.filter(query, narrow=query.startswith(self.query))
+
+
+# ---- Search
+
+
+def normalize_query(query):
+    return " ".join(sub(r"[^\w\s]", " ", query.lower()).split())
+
+
+def cached_search(site, query):
+    key = (site, normalize_query(query))
+    if key not in SEARCH_CACHE:
+        SEARCH_CACHE[key] = search_anime(site, query)
+    return SEARCH_CACHE.get(key)
+
+
+def prefetch(query_list, index, around=2):
+    for _, url in query_list[max(0, index - 1) : index + around + 1]:
+        if url not in PREFETCH:
+            PREFETCH[url] = PREFETCH_POOL.submit(count_episodes, url)
+
+
+def spin_until(text, future):
+    if not future.done():
+        with Halo(text=text):
+            wait([future])
+    return future.result()
+
+
+SEARCH_CACHE = dict()
+PREFETCH = dict()
+PREFETCH_POOL = ThreadPoolExecutor(max_workers=4)
+
+
 # ---- Input
 
 
-def is_valid_site(site):
+def is_valid_mirror(site):
     try:
         return get(site).status_code == 200
     except Exception:
         return False
 
 
+def is_valid_site(site):
+    mirrors = [mirror.strip() for mirror in site.split(",") if mirror.strip()]
+    return bool(mirrors) and all(PREFETCH_POOL.map(is_valid_mirror, mirrors))
+
+
+def is_valid_rate(rate):
+    try:
+        parse_rate(rate)
+        return True
+    except ValueError:
+        return False
+
+
+def is_valid_schedule(schedule):
+    try:
+        parse_schedule(schedule)
+        return True
+    except ValueError:
+        return False
+
+
 def is_bot_valid(token):
     try:
         Bot(token)
@@ -247,28 +399,31 @@ c_button = CONFIG_COLORS.get("button")
 
 
 def manage():
-    index = 0
+    view = AnimeView()
     k = "start"
     while k != "q":
-        anime_list = [list(anime.values()) for anime in get_config().get("anime")]
-        print(pprint_anime(anime_list, index))
-        print(pprint_actions())
-        k = direct_input(choices=("w", "s", "e", "a", "r", "q"))
-        erase(len(anime_list or [0]) + 2)
-
+        view.load()
+        view.render()
+        k = direct_input(choices=("w", "s", "n", "p", "f", "e", "a", "r", "q"))
         if k in ("w", "s"):
-            if k == "w" and index:
-                index -= 1
-            if k == "s" and index < len(anime_list) - 1:
-                index += 1
+            view.move(-1 if k == "w" else 1)
+        if k in ("n", "p"):
+            view.move(view.viewport.height() * (1 if k == "n" else -1))
+        if k == "f":
+            view.read_filter()
+            continue
+        if k in ("e", "a", "q"):
+            view.clear()
 
         if k == "e":
             e_k = "start"
             while e_k != "b":
                 print(pprint_settings())
                 print(pprint_actions(mode="settings"))
-                e_k = direct_input(choices=("u", "r", "p", "t", "c", "b", "f", "s"))
-                erase(7)
+                e_k = direct_input(
+                    choices=("u", "r", "p", "t", "c", "b", "f", "s", "l")
+                )
+                erase(8)
                 if e_k == "p":
                     base = paint("[@bold]Path[/@]: ")
                     new_path = strict_input(
@@ -279,7 +434,7 @@ def manage():
                     )
                     add_new_path(new_path)
                 if e_k == "s":
-                    base = paint("[@bold]Site[/@]: ")
+                    base = paint("[@bold]Site[/@] (comma separated mirrors): ")
                     new_site = strict_input(
                         base,
                         wrong_text=paint(f"[#red]Wrong site![/] {base}"),
@@ -299,19 +454,31 @@ def manage():
                     )
                     erase(5)
                     add_format(new_format)
+                elif e_k == "l":
+                    base = paint("[@bold]Default rate [2M|500K|0][/@]: ")
+                    default = strict_input(
+                        base,
+                        wrong_text=paint(f"[#red]Invalid rate![/] {base}"),
+                        check=is_valid_rate,
+                        flush=True,
+                    )
+                    base = paint("[@bold]Schedule [08:00-23:00=2M,...][/@]: ")
+                    schedule = strict_input(
+                        base,
+                        wrong_text=paint(f"[#red]Invalid schedule![/] {base}"),
+                        check=is_valid_schedule,
+                        flush=True,
+                    )
+                    add_bandwidth(
+                        None if parse_rate(default) is None else default,
+                        parse_schedule(schedule),
+                    )
                 elif e_k == "r":
-                    backup_filename = get_last_backup()
-                    if backup_filename:
-                        backup_dict = load(open(backup_filename))
+                    backup_dict = get_backups().restore()
+                    if backup_dict:
                         save_config(backup_dict)
                 elif e_k == "u":
-                    now = datetime.now()
-                    config = get_config()
-                    dump(
-                        config,
-                        open(f"{now:%Y-%m-%d}_saturno-backup.json", "w"),
-                        indent=4,
-                    )
+                    get_backups().create(get_config())
                 elif e_k == "t":
                     base = paint("[@bold]Telegram bot token[/@]: ")
                     telegram_bot_token = strict_input(
@@ -354,27 +521,29 @@ def manage():
                     erase(5)
                     add_colors(colors)
 
-        if anime_list and k == "r":
-            print(pprint_anime(anime_list, index, remove=True))
-            print(pprint_actions(mode="confirm"))
+        if view.selected() is not None and k == "r":
+            view.render(mode="confirm", remove=True)
             r_k = direct_input(choices=("y", "b"))
             if r_k == "y":
-                remove_anime(index)
-                index = 0
-            erase(len(anime_list) + 2)
+                remove_anime(view.selected())
+                view.index = 0
 
         if k == "a":
             q_index = 0
             q_k = "start"
             query = input(paint("[@bold]Anime name[/@]: "))
             erase()
-            query_list = search_anime(get_config().get("site"), query)
+            query_list = spin_until(
+                paint(f"Searching [#blue]{query}[/]"),
+                PREFETCH_POOL.submit(cached_search, best_site(), query),
+            )
             if not query_list:
                 ppaint(f"No anime found with [#blue]{query}[/]")
                 print(pprint_actions(mode="back"))
                 q_k = direct_input(choices=("b",))
                 erase(3)
             while q_k not in ("c", "b"):
+                prefetch(query_list, q_index)
                 print(pprint_query(query_list, q_index))
                 print(pprint_actions(mode="add"))
                 q_k = direct_input()
@@ -385,6 +554,11 @@ def manage():
                     if q_k == "s" and q_index < len(query_list) - 1:
                         q_index += 1
             if q_k == "c":
+                _, url = query_list[q_index]
+                try:
+                    spin_until("Loading episodes", PREFETCH.get(url))
+                except Exception:
+                    pass
                 base = paint("[@bold]Season[/@]: ")
                 season = strict_input(
                     base,
@@ -406,5 +580,5 @@ def manage():
                 c_k = direct_input(choices=("y", "n"))
                 if c_k == "y":
                     add_anime(*query_list[q_index], season, name, mode)
-                erase(7)
-                index = 0
+                erase(8)
+                view.index = 0
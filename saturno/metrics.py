@@ -0,0 +1,177 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from cProfile import Profile
+from datetime import datetime
+from functools import wraps
+from io import StringIO
+from os import listdir, path, remove
+from pstats import Stats
+from threading import RLock
+from time import perf_counter, time
+from uuid import uuid4
+
+from saturno.config import CACHE_DIR
+from saturno.storage import save_json, write_atomic
+
+SETTINGS = {
+    "report-dir": path.join(CACHE_DIR, "reports"),
+    "keep": 50,
+    "prometheus": None,
+    "profile": False,
+}
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = RLock()
+        self.clear()
+
+    def clear(self):
+        self.start = time()
+        self.phases = defaultdict(
+            lambda: {"calls": 0, "seconds": 0.0, "bytes": 0, "errors": 0}
+        )
+        self.events = defaultdict(int)
+        self.profiles = list()
+
+    @contextmanager
+    def timed(self, phase):
+        start = perf_counter()
+        try:
+            yield
+        except Exception:
+            with self.lock:
+                self.phases[phase]["errors"] += 1
+            raise
+        finally:
+            with self.lock:
+                self.phases[phase]["calls"] += 1
+                self.phases[phase]["seconds"] += perf_counter() - start
+
+    def add_bytes(self, phase, amount):
+        with self.lock:
+            self.phases[phase]["bytes"] += amount
+
+    def incr(self, event, amount=1):
+        with self.lock:
+            self.events[event] += amount
+
+    def add_profile(self, profile):
+        with self.lock:
+            self.profiles.append(profile)
+
+    def report(self):
+        with self.lock:
+            return {
+                "start": datetime.fromtimestamp(self.start).isoformat(),
+                "duration": time() - self.start,
+                "phases": {k: dict(v) for k, v in self.phases.items()},
+                "events": dict(self.events),
+            }
+
+    def snapshot(self):
+        with self.lock:
+            report, profiles = self.report(), self.profiles
+            self.clear()
+            return report, profiles
+
+
+METRICS = Metrics()
+
+
+def configure(report_dir=None, keep=None, prometheus=None, profile=None):
+    new = {
+        "report-dir": report_dir,
+        "keep": keep,
+        "prometheus": prometheus,
+        "profile": profile,
+    }
+    SETTINGS.update({k: v for k, v in new.items() if v is not None})
+
+
+def timed(phase):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with METRICS.timed(phase):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def profiled(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not SETTINGS.get("profile"):
+            return func(*args, **kwargs)
+        profile = Profile()
+        try:
+            return profile.runcall(func, *args, **kwargs)
+        finally:
+            METRICS.add_profile(profile)
+
+    return wrapper
+
+
+def prometheus_text(report):
+    lines = list()
+    for metric, key, help_text in (
+        ("saturno_run_phase_calls", "calls", "Calls per phase in the last run"),
+        ("saturno_run_phase_seconds", "seconds", "Seconds per phase in the last run"),
+        ("saturno_run_phase_bytes", "bytes", "Bytes per phase in the last run"),
+        ("saturno_run_phase_errors", "errors", "Errors per phase in the last run"),
+    ):
+        lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} gauge"]
+        lines += [
+            f'{metric}{{phase="{phase}"}} {values.get(key)}'
+            for phase, values in sorted(report.get("phases").items())
+        ]
+    lines += [
+        "# HELP saturno_run_events Retries and cache events in the last run",
+        "# TYPE saturno_run_events gauge",
+    ]
+    lines += [
+        f'saturno_run_events{{event="{event}"}} {count}'
+        for event, count in sorted(report.get("events").items())
+    ]
+    lines += [
+        "# HELP saturno_run_duration_seconds Duration of the last run",
+        "# TYPE saturno_run_duration_seconds gauge",
+        f"saturno_run_duration_seconds {report.get('duration'):.3f}",
+        "# HELP saturno_run_timestamp_seconds End time of the last run",
+        "# TYPE saturno_run_timestamp_seconds gauge",
+        f"saturno_run_timestamp_seconds {time():.0f}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def profile_text(profiles, limit=25):
+    output = StringIO()
+    stats = Stats(profiles[0], stream=output)
+    for profile in profiles[1:]:
+        stats.add(profile)
+    stats.sort_stats("cumulative").print_stats(limit)
+    return stats, output.getvalue()
+
+
+def write_reports():
+    report, profiles = METRICS.snapshot()
+    report_dir = SETTINGS.get("report-dir")
+    name = f"{datetime.now():%Y%m%d-%H%M%S-%f}-{uuid4().hex[:6]}"
+    save_json(path.join(report_dir, f"{name}.json"), report, indent=4)
+    if prometheus := SETTINGS.get("prometheus"):
+        write_atomic(prometheus, lambda f: f.write(prometheus_text(report)))
+    text = None
+    if profiles:
+        stats, text = profile_text(profiles)
+        stats.dump_stats(path.join(report_dir, f"{name}.prof"))
+    for suffix in (".json", ".prof"):
+        reports = sorted(f for f in listdir(report_dir) if f.endswith(suffix))
+        for old in reports[: max(0, len(reports) - SETTINGS.get("keep"))]:
+            try:
+                remove(path.join(report_dir, old))
+            except FileNotFoundError:
+                pass
+    return report, text
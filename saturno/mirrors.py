@@ -0,0 +1,157 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from threading import Event, Lock
+from time import perf_counter, time
+from urllib.parse import urlparse
+
+from saturno.adaptive import slot
+from saturno.metrics import METRICS
+from saturno.session import get as direct_get
+
+SETTINGS = {"hedge": True, "hedge-delay": 1.5, "probe-ttl": 600, "probe-timeout": 5}
+
+
+class Mirrors:
+    def __init__(self):
+        self.lock = Lock()
+        self.mirrors = list()
+        self.latency = dict()
+        self.healthy = dict()
+        self.probed = 0
+        self.probe_lock = Lock()
+        self.pool = ThreadPoolExecutor(max_workers=32)
+
+    def configure(self, mirrors):
+        with self.lock:
+            self.mirrors = [mirror.rstrip("/") for mirror in mirrors if mirror]
+            self.probed = 0
+
+    def mirror_of(self, url):
+        netloc = urlparse(url).netloc
+        for mirror in self.mirrors:
+            if urlparse(mirror).netloc == netloc:
+                return mirror
+        return None
+
+    def rewrite(self, url, mirror):
+        parsed, target = urlparse(url), urlparse(mirror)
+        return parsed._replace(scheme=target.scheme, netloc=target.netloc).geturl()
+
+    def record(self, mirror, seconds, healthy):
+        with self.lock:
+            previous = self.latency.get(mirror)
+            self.latency[mirror] = (
+                seconds if previous is None else 0.7 * previous + 0.3 * seconds
+            )
+            self.healthy[mirror] = healthy
+
+    def request(self, url, started=None, **kwargs):
+        mirror = self.mirror_of(url)
+        with slot("scrape"):
+            if started:
+                started.set()
+            start = perf_counter()
+            try:
+                response = direct_get(url, **kwargs)
+            except Exception:
+                self.record(mirror, SETTINGS.get("probe-timeout"), False)
+                raise
+        self.record(mirror, perf_counter() - start, response.status_code < 500)
+        return response
+
+    def probe(self):
+        timeout = SETTINGS.get("probe-timeout")
+        probe = {"retries": 0, "timeout": timeout}
+        try:
+            futures = {
+                mirror: self.pool.submit(self.request, mirror, **probe)
+                for mirror in self.mirrors
+            }
+            wait(futures.values(), timeout=timeout)
+            for mirror, future in futures.items():
+                if not future.done():
+                    self.record(mirror, timeout, False)
+        finally:
+            self.probe_lock.release()
+
+    def ranked(self):
+        stale = time() - self.probed > SETTINGS.get("probe-ttl")
+        if len(self.mirrors) > 1 and stale and self.probe_lock.acquire(False):
+            self.probed = time()
+            probing = self.pool.submit(self.probe)
+            if not self.latency:
+                wait([probing], timeout=SETTINGS.get("probe-timeout") + 1)
+        with self.lock:
+            return sorted(
+                self.mirrors,
+                key=lambda m: (
+                    not self.healthy.get(m, True),
+                    self.latency.get(m, float("inf")),
+                ),
+            )
+
+    def is_healthy(self, mirror):
+        with self.lock:
+            return self.healthy.get(mirror, True)
+
+    def best(self):
+        ranked = self.ranked()
+        return ranked[0] if ranked else None
+
+    def get(self, url, **kwargs):
+        if not self.mirror_of(url):
+            return direct_get(url, **kwargs)
+        candidates = [self.rewrite(url, mirror) for mirror in self.ranked()]
+        started = Event()
+        primary = self.pool.submit(self.request, candidates[0], started, **kwargs)
+        if not SETTINGS.get("hedge") or len(candidates) < 2:
+            return primary.result()
+        started.wait()
+        done, _ = wait([primary], timeout=SETTINGS.get("hedge-delay"))
+        if done and not primary.exception():
+            return primary.result()
+        METRICS.incr("hedged")
+        pending = {primary, self.pool.submit(self.request, candidates[1], **kwargs)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if not future.exception() and future.result().status_code < 500:
+                    return future.result()
+        return primary.result()
+
+
+MIRRORS = Mirrors()
+
+
+def site_list(site):
+    if not site:
+        return list()
+    return [site] if isinstance(site, str) else list(site)
+
+
+def configure(site=None, hedge=None, hedge_delay=None, probe_ttl=None):
+    if site is not None:
+        MIRRORS.configure(site_list(site))
+    new = {"hedge": hedge, "hedge-delay": hedge_delay, "probe-ttl": probe_ttl}
+    SETTINGS.update({k: v for k, v in new.items() if v is not None})
+
+
+def get(url, **kwargs):
+    return MIRRORS.get(url, **kwargs)
+
+
+def best_site():
+    return MIRRORS.best()
+
+
+def preferred(url):
+    best, mirror = MIRRORS.best(), MIRRORS.mirror_of(url)
+    if not best or not MIRRORS.is_healthy(best):
+        return url
+    if mirror and MIRRORS.is_healthy(mirror):
+        return url
+    return MIRRORS.rewrite(url, best)
+
+
+def relocations(urls):
+    moved = {url: preferred(url) for url in set(urls) if url}
+    return {old: new for old, new in moved.items() if old != new}
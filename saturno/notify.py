@@ -0,0 +1,140 @@
+from datetime import datetime
+from queue import Empty, Full, Queue
+from threading import Lock, Thread
+from time import monotonic, sleep
+
+STOP = object()
+
+
+def format_event(name, season, episode, success):
+    emoji = ":white_check_mark:" if success else ":no_entry:"
+    title = "Download Succesfull" if success else "Download Failed"
+    return (
+        f"{emoji} *{title}* {emoji}\n\n"
+        f":clapper: *{name}*\n"
+        f":cyclone: Episode *{season}*×*{episode}*\n"
+        f":calendar: {datetime.now():%d.%m.%Y}\n"
+    )
+
+
+def format_digest(events):
+    if len(events) == 1:
+        return format_event(*events[0])
+    done = [event for event in events if event[3]]
+    failed = [event for event in events if not event[3]]
+    lines = [f":package: *Saturno* - {datetime.now():%d.%m.%Y %H:%M}\n"]
+    if done:
+        lines.append(f":white_check_mark: *Downloaded* ({len(done)})")
+        lines += [f":clapper: {name} *{s}*×*{e}*" for name, s, e, _ in done]
+    if failed:
+        lines.append(f"\n:no_entry: *Failed* ({len(failed)})")
+        lines += [f":clapper: {name} *{s}*×*{e}*" for name, s, e, _ in failed]
+    return "\n".join(lines)
+
+
+class Notifier:
+    def __init__(self):
+        self.lock = Lock()
+        self.queue = None
+        self.thread = None
+        self.bot = None
+        self.settings = {
+            "token": None,
+            "chat-id": None,
+            "digest": False,
+            "window": 300,
+            "retries": 5,
+            "buffer": 100,
+        }
+
+    def configure(
+        self,
+        token=None,
+        chat_id=None,
+        digest=None,
+        window=None,
+        retries=None,
+        buffer=None,
+    ):
+        if token is not None and token != self.settings.get("token"):
+            self.bot = None
+        new = {
+            "token": token,
+            "chat-id": chat_id,
+            "digest": digest,
+            "window": window,
+            "retries": retries,
+            "buffer": buffer,
+        }
+        self.settings.update({k: v for k, v in new.items() if v is not None})
+
+    def enabled(self):
+        return self.settings.get("token") and self.settings.get("chat-id")
+
+    def notify(self, name, season, episode, success=True):
+        if not self.enabled():
+            return
+        self.start()
+        event = (name, season, episode, success)
+        while True:
+            try:
+                return self.queue.put_nowait(event)
+            except Full:
+                try:
+                    self.queue.get_nowait()
+                except Empty:
+                    pass
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.queue = Queue(self.settings.get("buffer"))
+                self.thread = Thread(target=self.worker, daemon=True)
+                self.thread.start()
+
+    def close(self, timeout=30):
+        with self.lock:
+            thread, self.thread = self.thread, None
+        if thread is not None:
+            self.queue.put(STOP)
+            thread.join(timeout)
+
+    def worker(self):
+        while True:
+            event = self.queue.get()
+            if event is STOP:
+                return
+            events = [event]
+            if self.settings.get("digest"):
+                deadline = monotonic() + self.settings.get("window")
+                while (left := deadline - monotonic()) > 0:
+                    try:
+                        event = self.queue.get(timeout=left)
+                    except Empty:
+                        break
+                    if event is STOP:
+                        self.send(format_digest(events))
+                        return
+                    events.append(event)
+                self.send(format_digest(events))
+            else:
+                self.send(format_event(*event))
+
+    def send(self, msg):
+        from emoji import emojize
+        from telegram import Bot
+
+        for attempt in range(self.settings.get("retries")):
+            try:
+                if self.bot is None:
+                    self.bot = Bot(self.settings.get("token"))
+                return self.bot.send_message(
+                    self.settings.get("chat-id"),
+                    emojize(msg, use_aliases=True),
+                    parse_mode="Markdown",
+                )
+            except Exception:
+                sleep(min(2**attempt, 60))
+
+
+NOTIFIER = Notifier()
@@ -0,0 +1,94 @@
+from html import unescape
+from re import compile, search
+
+BACKEND = {"name": "auto"}
+EPISODE_LIST = compile(r"<div\b[^>]*\bclass=[\"'][^\"']*\btab-content\b")
+DIV_TAG = compile(r"<(/?)div\b")
+ANCHOR = compile(r"<a\b[^>]*?\bhref=[\"']([^\"']*)[\"']")
+
+
+def has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def lxml_available():
+    try:
+        from lxml import html  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def set_backend(name):
+    BACKEND["name"] = name or "auto"
+
+
+def use_lxml(html):
+    if BACKEND.get("name") in ("auto", "lxml"):
+        BACKEND["name"] = "lxml" if lxml_available() else "html.parser"
+    return BACKEND.get("name") == "lxml" and html.strip()
+
+
+def lxml_tree(html):
+    from lxml import html as lxml_html
+
+    return lxml_html.fromstring(html)
+
+
+def strained_soup(html, *args):
+    from bs4 import BeautifulSoup, SoupStrainer
+
+    return BeautifulSoup(html, "html.parser", parse_only=SoupStrainer(*args))
+
+
+# ---- Extractors
+
+
+def parse_search(html):
+    if use_lxml(html):
+        groups = lxml_tree(html).xpath(f"//ul[{has_class('list-group')}]")
+        return [
+            (group.xpath(".//h3")[0].text_content()[1:-1], group.xpath(".//a/@href")[0])
+            for group in groups
+        ]
+    soup = strained_soup(html, "ul", {"class": "list-group"})
+    return [
+        (group.find("h3").text[1:-1], group.find("a").get("href"))
+        for group in soup.findAll("ul", {"class": "list-group"})
+    ]
+
+
+def episode_list(html):
+    start = EPISODE_LIST.search(html)
+    if not start:
+        return None
+    depth = 0
+    for tag in DIV_TAG.finditer(html, start.start()):
+        depth += -1 if tag.group(1) else 1
+        if not depth:
+            return html[start.start() : html.find(">", tag.end()) + 1]
+    return html[start.start() :]
+
+
+def iter_episode_links(markup, pos=0):
+    for anchor in ANCHOR.finditer(markup, pos):
+        link = unescape(anchor.group(1))
+        if episode := search(r"ep-(\d+)", link):
+            yield int(episode.group(1)), link, anchor.end()
+
+
+def parse_watch_link(html):
+    if use_lxml(html):
+        return lxml_tree(html).xpath(f"//div[{has_class('card-body')}]//a/@href")[0]
+    soup = strained_soup(html, "div", {"class": "card-body"})
+    return soup.find("div", {"class": "card-body"}).find("a").get("href")
+
+
+def parse_stream_link(html):
+    if link := search(r"\"([^\"]*\.(m3u8|mp4))\"", html):
+        return link.group(1)
+    if use_lxml(html):
+        sources = lxml_tree(html).xpath("//source/@src")
+        return sources[0] if sources else None
+    source = strained_soup(html, "source").find("source")
+    return source and source.get("src")
@@ -0,0 +1,37 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+
+class ResolvePipeline:
+    def __init__(self, resolve, ahead=2, workers=4):
+        self.resolve = resolve
+        self.ahead = ahead
+        self.lock = Lock()
+        self.futures = dict()
+        self.resolvers = ThreadPoolExecutor(max_workers=max(1, workers))
+        self.bookkeeper = ThreadPoolExecutor(max_workers=1)
+
+    def submit(self, link):
+        with self.lock:
+            if link not in self.futures:
+                self.futures[link] = self.resolvers.submit(self.resolve, link)
+            return self.futures.get(link)
+
+    def prefetch(self, links):
+        for link in links[: self.ahead]:
+            self.submit(link)
+
+    def get(self, link):
+        future = self.submit(link)
+        try:
+            return future.result()
+        finally:
+            with self.lock:
+                self.futures.pop(link, None)
+
+    def after(self, func, *args):
+        self.bookkeeper.submit(func, *args)
+
+    def close(self):
+        self.resolvers.shutdown(wait=True)
+        self.bookkeeper.shutdown(wait=True)
@@ -0,0 +1,25 @@
+from os import path, remove, replace
+
+from saturno.storage import load_json, save_json
+
+
+def part_name(filename):
+    return f"{filename}.part"
+
+
+def progress_name(filename):
+    return f"{filename}.progress.part"
+
+
+def load_progress(filename):
+    return load_json(progress_name(filename))
+
+
+def save_progress(filename, progress):
+    save_json(progress_name(filename), progress, suffix=".tmp.part")
+
+
+def complete(filename):
+    replace(part_name(filename), filename)
+    if path.exists(progress_name(filename)):
+        remove(progress_name(filename))
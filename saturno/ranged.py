@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from os import path
+from re import search
+
+from saturno.adaptive import slot
+from saturno.progress import complete, load_progress, part_name, save_progress
+from saturno.session import get
+from saturno.throttle import throttle
+
+try:
+    from os import posix_fallocate
+except ImportError:
+    posix_fallocate = None
+
+
+class RangeUnsupported(Exception):
+    pass
+
+
+def probe(url):
+    with get(url, headers={"Range": "bytes=0-0"}, stream=True) as response:
+        content_range = response.headers.get("Content-Range", "")
+    if response.status_code != 206 or not search(r"/(\d+)$", content_range):
+        raise RangeUnsupported(f"Range probe answered {response.status_code}")
+    return int(search(r"/(\d+)$", content_range).group(1))
+
+
+def preallocate(filename, size):
+    with open(part_name(filename), "wb") as file:
+        if posix_fallocate:
+            posix_fallocate(file.fileno(), 0, size)
+        else:
+            file.truncate(size)
+
+
+def fetch_range(url, filename, start, end):
+    headers = {"Range": f"bytes={start}-{end}"}
+    with slot("download"), get(url, headers=headers, stream=True) as response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise RangeUnsupported("Server ignored the byte range")
+        with open(part_name(filename), "r+b") as file:
+            file.seek(start)
+            for data in response.iter_content(64 * 1024):
+                throttle(len(data))
+                file.write(data)
+
+
+def download_ranged(url, filename, chunk_size=8 * 1024 * 1024, connections=4):
+    size = probe(url)
+    progress = load_progress(filename)
+    if (
+        not progress
+        or progress.get("size") != size
+        or progress.get("chunk") != chunk_size
+        or not path.exists(part_name(filename))
+    ):
+        preallocate(filename, size)
+        progress = {"size": size, "chunk": chunk_size, "done": []}
+        save_progress(filename, progress)
+    chunks = [
+        (start // chunk_size, start, min(start + chunk_size, size) - 1)
+        for start in range(0, size, chunk_size)
+    ]
+    with ThreadPoolExecutor(max_workers=max(1, connections)) as pool:
+        futures = {
+            pool.submit(fetch_range, url, filename, start, end): index
+            for index, start, end in chunks
+            if index not in progress.get("done")
+        }
+        for future in as_completed(futures):
+            future.result()
+            progress["done"].append(futures[future])
+            save_progress(filename, progress)
+    complete(filename)
@@ -0,0 +1,46 @@
+from asyncio import Semaphore, gather, get_running_loop, run
+from concurrent.futures import ThreadPoolExecutor
+
+from saturno.anime import get_episodes_link
+from saturno.metrics import profiled
+
+
+def episodes_to_download(mode, eps_available, downloaded_eps):
+    if mode == "full":
+        return [ep for ep in eps_available if ep not in downloaded_eps]
+    last_ep_downloaded = 0 if not downloaded_eps else max(downloaded_eps)
+    return [ep for ep in eps_available if ep > last_ep_downloaded]
+
+
+async def refresh_anime(semaphore, executor, anime, downloaded):
+    loop = get_running_loop()
+    async with semaphore:
+        try:
+            links = await loop.run_in_executor(
+                executor, profiled(get_episodes_link), anime.get("site")
+            )
+            downloaded_eps = await loop.run_in_executor(
+                executor, downloaded, anime.get("folder"), anime.get("season")
+            )
+        except Exception as error:
+            return anime, None, error
+    if links is None:
+        return anime, None, None
+    return anime, links, episodes_to_download(
+        anime.get("mode"), sorted(links), downloaded_eps
+    )
+
+
+async def refresh_all(anime_list, downloaded, limit):
+    semaphore = Semaphore(max(1, limit))
+    with ThreadPoolExecutor(max_workers=max(1, limit)) as executor:
+        return await gather(
+            *[
+                refresh_anime(semaphore, executor, anime, downloaded)
+                for anime in anime_list
+            ]
+        )
+
+
+def refresh_catalog(anime_list, downloaded, limit=8):
+    return run(refresh_all(anime_list, downloaded, limit))
@@ -1,19 +1,45 @@
 from argparse import ArgumentParser
-from datetime import datetime
-from os import makedirs, path, walk
+from functools import partial
+from os import makedirs, path
 from re import search
+from threading import Event, Lock, Thread
 
 from colorifix.colorifix import paint, ppaint
-from emoji import emojize
-from halo import Halo
-from pymortafix.utils import multisub
-from saturno.anime import get_download_link, get_episodes_link
-from saturno.manage import get_config, manage
-from telegram import Bot
-from youtube_dl import YoutubeDL
+from saturno.adaptive import configure as configure_adaptive
+from saturno.adaptive import status as concurrency_status
+from saturno.adaptive import summary as concurrency_summary
+from saturno.anime import get_download_link, invalidate_download_link
+from saturno.backup import configure as configure_backups
+from saturno.cache import SETTINGS as CACHE_SETTINGS
+from saturno.cache import configure as configure_cache
+from saturno.cache import get_links
+from saturno.config import STORE
+from saturno.hls import HlsUnsupported, download_hls
+from saturno.journal import configure as configure_journal
+from saturno.journal import get_journal, job_key
+from saturno.lease import configure as configure_leases
+from saturno.lease import get_leases
+from saturno.library import LIBRARY
+from saturno.metrics import METRICS
+from saturno.metrics import configure as configure_metrics
+from saturno.metrics import timed, write_reports
+from saturno.mirrors import configure as configure_mirrors
+from saturno.mirrors import relocations, site_list
+from saturno.notify import NOTIFIER
+from saturno.parser import set_backend
+from saturno.pipeline import ResolvePipeline
+from saturno.ranged import RangeUnsupported, download_ranged
+from saturno.refresh import refresh_catalog
+from saturno.scheduler import run_jobs
+from saturno.session import configure as configure_session
+from saturno.storage import load_json
+from saturno.throttle import configure as configure_throttle
+from saturno.throttle import throughput, youtube_dl_hook
 
-CONFIG = get_config()
-SPINNER = Halo()
+CONFIG = STORE
+SPINNER = None
+SPINNER_LOCK = Lock()
+ACTIVE_DOWNLOADS = dict()
 
 
 # --- COLORS
@@ -27,19 +53,36 @@ c_episode_download = COLORS.get("episode-download")
 # --- UTILS
 
 
+def season_folder(folder_name, season):
+    return path.join(CONFIG.get("path"), folder_name, f"Stagione {season}")
+
+
 def last_episodes_downloaded(folder_name, season):
-    tree = list(walk(path.join(CONFIG.get("path"), folder_name, f"Stagione {season}")))
-    if not tree:
-        return []
-    _, _, files = tree[0]
-    return [
-        int(se_ep.group(1))
-        for file in files
-        if (se_ep := search(r"_s\d+e(\d+).+(?<!part)$", file))
+    return LIBRARY.episodes(season_folder(folder_name, season))
+
+
+def reindex():
+    folders = [
+        season_folder(anime.get("folder"), anime.get("season"))
+        for anime in CONFIG.get("anime")
     ]
+    for folder, entry in LIBRARY.rebuild(folders).items():
+        episodes = len(entry.get("episodes"))
+        ppaint(f"[@bold]{folder}[/@] [#{c_episode_download}]{episodes}[/] episodes")
+
+
+def get_spinner():
+    global SPINNER
+    if SPINNER is None:
+        from halo import Halo
+
+        SPINNER = Halo()
+    return SPINNER
 
 
 def sanitize_name(name):
+    from pymortafix.utils import multisub
+
     return multisub({":": "", " ": "_"}, name)
 
 
@@ -52,104 +95,390 @@ def build_filename(base, title, season, episode):
     return path.join(base, f"{filename}.mp4")
 
 
+@timed("notify")
 def send_telegram_log(name, season, episode, success=True):
-    config = get_config()
-    bot_token = config.get("telegram-bot-token")
-    chat_id = config.get("telegram-chat-id")
-    if bot_token and chat_id:
-        emoji = ":white_check_mark:" if success else ":no_entry:"
-        title = "Download Succesfull" if success else "Download Failed"
-        msg = (
-            f"{emoji} *{title}* {emoji}\n\n"
-            f":clapper: *{name}*\n"
-            f":cyclone: Episode *{season}*×*{episode}*\n"
-            f":calendar: {datetime.now():%d.%m.%Y}\n"
-        )
-        Bot(bot_token).send_message(
-            chat_id, emojize(msg, use_aliases=True), parse_mode="Markdown"
-        )
+    NOTIFIER.configure(
+        token=CONFIG.get("telegram-bot-token"),
+        chat_id=CONFIG.get("telegram-chat-id"),
+    )
+    NOTIFIER.notify(name, season, episode, success)
+
 
+def download_youtube_dl(url, filename):
+    from youtube_dl import YoutubeDL
 
-def download_video(url, name, filename):
     with YoutubeDL(
         {
             "outtmpl": filename,
             "quiet": True,
             "no_warnings": True,
             "nocheckcertificate": True,
+            "progress_hooks": [youtube_dl_hook()],
         }
     ) as ydl:
         ydl.download([url])
 
 
-def spinner(func, action, anime, season, episode):
-    func(
-        paint(
-            f"[#{c_action_download}]{action} "
-            f"[#{c_anime_download}]{anime} "
-            f"[#{c_episode_download}]{season}x{episode}"
-        )
+def download_video(url, stream, filename):
+    if CONFIG.get("hls", True) and stream and ".m3u8" in stream:
+        try:
+            return download_hls(
+                stream,
+                filename,
+                quality=CONFIG.get("quality", "best"),
+                workers=CONFIG.get("segment-workers", 8),
+            )
+        except HlsUnsupported:
+            pass
+    if CONFIG.get("ranged", True) and stream and ".mp4" in stream:
+        try:
+            return download_ranged(
+                stream,
+                filename,
+                chunk_size=CONFIG.get("chunk-size-mb", 8) * 1024 * 1024,
+                connections=CONFIG.get("connections", 4),
+            )
+        except RangeUnsupported:
+            pass
+    download_youtube_dl(url, filename)
+
+
+def is_stream_error(error):
+    if getattr(error, "response", None) is not None:
+        return error.response.status_code >= 400
+    return bool(search(r"HTTP Error [45]\d\d", str(error)))
+
+
+def spinner(kind, action, anime, season, episode):
+    text = paint(
+        f"[#{c_action_download}]{action} "
+        f"[#{c_anime_download}]{anime} "
+        f"[#{c_episode_download}]{season}x{episode}"
     )
+    with SPINNER_LOCK:
+        if kind == "start":
+            ACTIVE_DOWNLOADS[(anime, season, episode)] = text
+            text = spinner_status()
+        else:
+            ACTIVE_DOWNLOADS.pop((anime, season, episode), None)
+        getattr(get_spinner(), kind)(text)
+        if kind != "start" and ACTIVE_DOWNLOADS:
+            get_spinner().start(spinner_status())
+
+
+def spinner_status():
+    text = list(ACTIVE_DOWNLOADS.values())[-1]
+    if len(ACTIVE_DOWNLOADS) > 1:
+        text += paint(f" [@bold](+{len(ACTIVE_DOWNLOADS) - 1})[/@]")
+    text += paint(f" [#{c_action_download}]{throughput()}")
+    return text + f" ({concurrency_status()})"
+
+
+def spinner_ticker(stop):
+    while not stop.wait(1):
+        with SPINNER_LOCK:
+            if ACTIVE_DOWNLOADS:
+                get_spinner().text = spinner_status()
 
 
 # --- DOWNLOADS
 
 
-def download(action):
-    anime_list = [list(anime.values()) for anime in CONFIG.get("anime")]
-    for name, url, season, folder, mode in anime_list:
-        downloaded_eps = last_episodes_downloaded(folder, season)
-        links, eps_available = get_episodes_link(url)
+def finish_episode(name, basepath, season, ep):
+    LIBRARY.refresh(basepath)
+    spinner("succeed", "Downloaded", name, season, ep)
+    send_telegram_log(name, season, ep)
+
+
+def download_episode(pipeline, name, link, season, folder, ep, upcoming=()):
+    pipeline.prefetch(upcoming)
+    leases = get_leases(CONFIG.get("path"))
+    key = job_key(folder, season, ep)
+    if not leases.acquire(key):
+        get_journal().remove(folder, season, ep)
+        spinner("info", "Claimed by another node", name, season, ep)
+        return True
+    try:
+        return claimed_episode(pipeline, name, link, season, folder, ep)
+    finally:
+        leases.release(key)
+
+
+def claimed_episode(pipeline, name, link, season, folder, ep):
+    basepath = season_folder(folder, season)
+    makedirs(basepath, exist_ok=True)
+    filename = build_filename(basepath, name, season, ep)
+    if path.exists(filename):
+        LIBRARY.refresh(basepath)
+        get_journal().done(folder, season, ep)
+        spinner("info", "Already downloaded", name, season, ep)
+        return True
+    spinner("start", "Downloading", name, season, ep)
+    get_journal().start(folder, season, ep)
+    try:
+        episode_link, download_link = pipeline.get(link)
+        with METRICS.timed("download"):
+            try:
+                download_video(episode_link, download_link, filename)
+            except Exception as error:
+                if not is_stream_error(error):
+                    raise
+                invalidate_download_link(link)
+                METRICS.incr("re-resolved")
+                download_video(*get_download_link(link), filename)
+    except Exception as error:
+        if is_stream_error(error):
+            invalidate_download_link(link)
+        delay = get_journal().fail(folder, season, ep, error)
+        action = f"Fail to download (retry in {delay // 60:.0f}m)"
+        spinner("fail", action, name, season, ep)
+        send_telegram_log(name, season, ep, success=False)
+        return False
+    get_journal().done(folder, season, ep)
+    pipeline.after(finish_episode, name, basepath, season, ep)
+    return True
+
+
+def plan_downloads(catalog):
+    plan = dict()
+    for anime, links, eps_to_download in catalog:
+        name, season = anime.get("name"), anime.get("season")
+        folder = anime.get("folder")
+        if isinstance(eps_to_download, Exception):
+            error = f"{eps_to_download.__class__.__name__}: {eps_to_download}"
+            ppaint(f"[@bold][{name}][#red /@] Refresh failed, {error}")
+            continue
         if links is None:
             ppaint(f"[@bold][{name}][#red /@] Link invalid, try to re-add it!")
             continue
-        if mode == "full":
-            eps_to_download = [ep for ep in eps_available if ep not in downloaded_eps]
-        else:
-            last_ep_downloaded = 0 if not downloaded_eps else max(downloaded_eps)
-            eps_to_download = [ep for ep in eps_available if ep > last_ep_downloaded]
-        for ep in eps_to_download:
-            if action == "run":
-                episode_link, download_link = get_download_link(links[ep - 1])
-                basepath = path.join(CONFIG.get("path"), folder, f"Stagione {season}")
-                if not path.exists(basepath):
-                    makedirs(basepath)
-                filename = build_filename(basepath, name, season, ep)
-                spinner(SPINNER.start, "Downloading", name, season, ep)
-                try:
-                    download_video(episode_link, name, filename)
-                except Exception:
-                    spinner(SPINNER.fail, "Fail to download", name, season, ep)
-                    send_telegram_log(name, season, ep, success=False)
-                    break
-                spinner(SPINNER.succeed, "Downloaded", name, season, ep)
-                send_telegram_log(name, season, ep)
-            elif action == "test":
-                spinner(SPINNER.info, "Found", name, season, ep)
+        journal = get_journal()
+        waiting = journal.failed(folder, season, due=False)
+        for ep in sorted(waiting):
+            spinner("info", "Waiting retry", name, season, ep)
+        retry = journal.failed(folder, season, due=True)
+        retry -= set(last_episodes_downloaded(folder, season))
+        eps = set(eps_to_download) | retry
+        plan[folder] = [
+            (name, links.get(ep), season, folder, ep)
+            for ep in sorted(eps - waiting)
+            if ep in links
+        ]
+    return plan
+
+
+def rewrite_stored_links(anime_list=None):
+    if len(site_list(CONFIG.get("site"))) < 2:
+        return
+    stored = load_json(STORE.filename, dict()).get("anime", list())
+    moved = relocations(anime.get("site") for anime in stored + (anime_list or []))
+    if not moved:
+        return
+    with STORE.batch() as config:
+        for anime in config.get("anime", list()) + (anime_list or []):
+            anime["site"] = moved.get(anime.get("site"), anime.get("site"))
+
+
+def download(action, anime_list=None):
+    journal = get_journal()
+    resumed = journal.unfinished() if action == "run" and anime_list is None else []
+    if resumed:
+        ppaint(f"Resuming [@bold]{len(resumed)}[/@] episodes from the journal")
+        plan = dict()
+        for name, folder, season, ep, link in resumed:
+            plan.setdefault(folder, list()).append((name, link, season, folder, ep))
+    else:
+        rewrite_stored_links(anime_list)
+        with METRICS.timed("refresh"):
+            catalog = refresh_catalog(
+                CONFIG.get("anime") if anime_list is None else anime_list,
+                last_episodes_downloaded,
+                limit=CONFIG.get("refresh-concurrency", 8),
+            )
+        plan = plan_downloads(catalog)
+    jobs = dict()
+    pipeline = ResolvePipeline(
+        get_download_link,
+        ahead=CONFIG.get("resolve-ahead", 2),
+        workers=CONFIG.get("resolve-workers", 4),
+    )
+    for folder, episodes in plan.items():
+        if action == "run":
+            for name, link, season, _, ep in episodes:
+                journal.enqueue(name, folder, season, ep, link)
+            series = [link for _, link, _, _, _ in episodes]
+            jobs[folder] = [
+                partial(download_episode, pipeline, *episode, series[i + 1 :])
+                for i, episode in enumerate(episodes)
+            ]
+        elif action == "test":
+            for name, link, season, _, ep in episodes:
+                cached = CACHE_SETTINGS.get("enabled") and get_links().lookup(link)
+                found = "Found (cached link)" if cached else "Found"
+                spinner("info", found, name, season, ep)
+    stop = Event()
+    Thread(target=spinner_ticker, args=(stop,), daemon=True).start()
+    try:
+        run_jobs(
+            jobs,
+            workers=CONFIG.get("workers", 1),
+            per_group=CONFIG.get("workers-per-anime", 1),
+            stop_on_failure=False,
+        )
+    finally:
+        pipeline.close()
+        stop.set()
+    journal.prune()
+    if plan:
+        ppaint(f"[@bold]Concurrency[/@]: {concurrency_summary()}")
+    if action == "test" and CACHE_SETTINGS.get("enabled"):
+        ppaint(
+            f"[@bold]Stream links[/@] cache: [#green]{get_links().hits}[/] hit, "
+            f"[#red]{get_links().misses}[/] miss"
+        )
+    _, profile = write_reports()
+    if profile:
+        print(profile)
+    return sum(len(episodes) for episodes in plan.values())
+
+
+def watch_error(anime, error):
+    name = anime.get("name") if anime else "Config"
+    ppaint(f"[@bold][{name}][#red /@] {error.__class__.__name__}: {error}")
+
+
+def watch_check(anime):
+    from saturno.catalog import CATALOG
+
+    download("run", [anime])
+    return CATALOG.take_arrivals(anime.get("site"))
+
+
+def watch_library():
+    from saturno.watch import configure as configure_watch
+    from saturno.watch import watch
+
+    settings = CONFIG.get("watch", dict())
+    seconds = {
+        key: settings.get(key) and settings.get(key) * 60
+        for key in ("interval-min", "min-interval-min", "max-interval-min")
+    }
+    configure_watch(
+        interval=seconds.get("interval-min"),
+        min_interval=seconds.get("min-interval-min"),
+        max_interval=seconds.get("max-interval-min"),
+        idle=settings.get("idle-weeks"),
+    )
+    watch(
+        lambda: CONFIG.get("anime"),
+        watch_check,
+        on_error=watch_error,
+    )
 
 
 def argparsing():
     parser = ArgumentParser(
         prog="Saturno",
         description="We are weebs.",
-        usage=("saturno action:{manage, run, test}"),
+        usage=(
+            "saturno action:{manage, run, test, watch, reindex} "
+            "[--no-cache] [--profile]"
+        ),
     )
     parser.add_argument(
         "action",
         type=str,
         nargs=1,
         help="action to do",
-        choices=("manage", "run", "test"),
+        choices=("manage", "run", "test", "watch", "reindex"),
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="always fetch pages from the site",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="profile the scrape phase with cProfile",
     )
     return parser.parse_args()
 
 
 def main():
     args = argparsing()
+    workers = CONFIG.get("workers", 1)
+    configure_session(
+        timeout=CONFIG.get("timeout"),
+        retries=CONFIG.get("retries"),
+        pool=max(
+            10,
+            workers * CONFIG.get("segment-workers", 8),
+            workers * CONFIG.get("connections", 4),
+            CONFIG.get("refresh-concurrency", 8),
+        ),
+    )
+    cache = CONFIG.get("cache", dict())
+    configure_cache(
+        enabled=not args.no_cache and cache.get("enabled", True),
+        size=cache.get("size-mb") and cache.get("size-mb") * 1024 * 1024,
+        ttl=cache.get("ttl"),
+        link_ttl=cache.get("link-ttl"),
+    )
+    notifications = CONFIG.get("notifications", dict())
+    NOTIFIER.configure(
+        digest=notifications.get("digest"),
+        window=notifications.get("window-sec"),
+        retries=notifications.get("retries"),
+        buffer=notifications.get("buffer"),
+    )
+    metrics = CONFIG.get("metrics", dict())
+    configure_metrics(
+        report_dir=metrics.get("report-dir"),
+        keep=metrics.get("keep"),
+        prometheus=metrics.get("prometheus"),
+        profile=args.profile,
+    )
+    retry = CONFIG.get("retry", dict())
+    configure_journal(
+        backoff=retry.get("backoff-min") and retry.get("backoff-min") * 60,
+        max_backoff=retry.get("max-backoff-min") and retry.get("max-backoff-min") * 60,
+    )
+    adaptive = CONFIG.get("adaptive", dict())
+    configure_adaptive(
+        enabled=adaptive.get("enabled"),
+        scrape=adaptive.get("scrape-max"),
+        download=adaptive.get("download-max"),
+        decrease=adaptive.get("decrease"),
+    )
+    backup = CONFIG.get("backup", dict())
+    configure_backups(directory=backup.get("directory"), keep=backup.get("keep"))
+    lease = CONFIG.get("lease", dict())
+    configure_leases(enabled=lease.get("enabled"), ttl=lease.get("ttl-sec"))
+    mirrors = CONFIG.get("mirrors", dict())
+    configure_mirrors(
+        site=CONFIG.get("site"),
+        hedge=mirrors.get("hedge"),
+        hedge_delay=mirrors.get("hedge-delay-sec"),
+        probe_ttl=mirrors.get("probe-ttl-min") and mirrors.get("probe-ttl-min") * 60,
+    )
+    bandwidth = CONFIG.get("bandwidth", dict())
+    try:
+        configure_throttle(bandwidth.get("default"), bandwidth.get("schedule"))
+    except ValueError as error:
+        ppaint(f"[@bold][Bandwidth][#red /@] {error}, running unthrottled")
+        configure_throttle()
+    set_backend(CONFIG.get("parser", "auto"))
     if args.action[0] == "manage":
+        from saturno.manage import manage
+
         manage()
     if args.action[0] in ("run", "test"):
         download(args.action[0])
+    if args.action[0] == "watch":
+        watch_library()
+    if args.action[0] == "reindex":
+        reindex()
+    NOTIFIER.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,28 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def run_jobs(jobs, workers=1, per_group=1, stop_on_failure=True):
+    queues = {group: list(tasks) for group, tasks in jobs.items() if tasks}
+    running = {}
+    active = {group: 0 for group in queues}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        while queues or running:
+            for group in list(queues):
+                while (
+                    queues.get(group)
+                    and active[group] < max(1, per_group)
+                    and len(running) < max(1, workers)
+                ):
+                    running[pool.submit(queues[group].pop(0))] = group
+                    active[group] += 1
+                if group in queues and not queues[group]:
+                    del queues[group]
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                group = running.pop(future)
+                active[group] -= 1
+                failed = future.exception() or not future.result()
+                if failed and stop_on_failure:
+                    queues.pop(group, None)
@@ -0,0 +1,72 @@
+from threading import Lock
+
+from saturno.adaptive import responded, signal, slot
+from saturno.metrics import METRICS
+
+SETTINGS = {"timeout": 15, "retries": 3, "backoff": 0.5, "pool": 10}
+SESSIONS = dict()
+SESSION_LOCK = Lock()
+
+
+def configure(timeout=None, retries=None, backoff=None, pool=None):
+    new = {"timeout": timeout, "retries": retries, "backoff": backoff, "pool": pool}
+    SETTINGS.update({k: v for k, v in new.items() if v is not None})
+    with SESSION_LOCK:
+        for session in SESSIONS.values():
+            session.close()
+        SESSIONS.clear()
+
+
+def build_session(retries):
+    from requests import Session
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    class CountingRetry(Retry):
+        def increment(self, *args, **kwargs):
+            METRICS.incr("retries")
+            signal(kwargs.get("response"))
+            return super().increment(*args, **kwargs)
+
+    retry = CountingRetry(
+        total=retries,
+        backoff_factor=SETTINGS.get("backoff"),
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=SETTINGS.get("pool"),
+        pool_maxsize=SETTINGS.get("pool"),
+        max_retries=retry,
+    )
+    session = Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"Connection": "keep-alive"})
+    return session
+
+
+def get_session(retries=None):
+    retries = SETTINGS.get("retries") if retries is None else retries
+    with SESSION_LOCK:
+        if retries not in SESSIONS:
+            SESSIONS[retries] = build_session(retries)
+        return SESSIONS.get(retries)
+
+
+def get(url, phase="scrape", retries=None, **kwargs):
+    kwargs.setdefault("timeout", SETTINGS.get("timeout"))
+    with slot(phase):
+        response = get_session(retries).get(url, **kwargs)
+        responded()
+        return response
+
+
+def head(url, phase="scrape", **kwargs):
+    kwargs.setdefault("timeout", SETTINGS.get("timeout"))
+    kwargs.setdefault("allow_redirects", True)
+    with slot(phase):
+        response = get_session().head(url, **kwargs)
+        responded()
+        return response
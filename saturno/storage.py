@@ -0,0 +1,45 @@
+from json import dump, load
+from os import fsync, makedirs, path, replace
+from tempfile import NamedTemporaryFile
+from threading import Lock
+
+
+def write_atomic(filename, write, mode="w", suffix=".tmp", durable=False):
+    directory = path.dirname(path.abspath(filename))
+    makedirs(directory, exist_ok=True)
+    with NamedTemporaryFile(mode, dir=directory, suffix=suffix, delete=False) as file:
+        write(file)
+        if durable:
+            file.flush()
+            fsync(file.fileno())
+    replace(file.name, filename)
+
+
+def load_json(filename, default=None):
+    try:
+        with open(filename) as file:
+            return load(file)
+    except (OSError, ValueError):
+        return default
+
+
+def save_json(filename, data, suffix=".tmp", durable=False, **kwargs):
+    def write(file):
+        dump(data, file, **kwargs)
+
+    write_atomic(filename, write, suffix=suffix, durable=durable)
+
+
+class JsonIndex:
+    def __init__(self, filename):
+        self.filename = filename
+        self.lock = Lock()
+        self.index = None
+
+    def load(self):
+        if self.index is None:
+            self.index = load_json(self.filename, dict())
+        return self.index
+
+    def save(self):
+        save_json(self.filename, self.index)
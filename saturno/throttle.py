@@ -0,0 +1,145 @@
+from collections import deque
+from datetime import datetime
+from re import IGNORECASE, fullmatch
+from threading import Lock
+from time import monotonic, sleep
+
+from saturno.metrics import METRICS
+
+UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3}
+
+
+def parse_rate(rate):
+    if rate in (None, "", 0) or str(rate).lower() in ("0", "none", "unlimited"):
+        return None
+    if isinstance(rate, (int, float)):
+        return float(rate)
+    pattern = r"(\d+(?:\.\d+)?)\s*([KMG]?)(?:B(?:/s)?)?"
+    match = fullmatch(pattern, str(rate).strip(), IGNORECASE)
+    if not match:
+        raise ValueError(f"Invalid rate: {rate}")
+    return float(match.group(1)) * UNITS[match.group(2).upper()]
+
+
+def format_rate(rate):
+    for unit in ("G", "M", "K"):
+        if rate >= UNITS[unit]:
+            return f"{rate / UNITS[unit]:.1f} {unit}B/s"
+    return f"{rate:.0f} B/s"
+
+
+def parse_schedule(text):
+    schedule = list()
+    for profile in filter(None, (p.strip() for p in text.split(","))):
+        match = fullmatch(r"(\d{1,2}:\d{2})-(\d{1,2}:\d{2})=(\S+)", profile)
+        if not match:
+            raise ValueError(f"Invalid profile: {profile}")
+        start, end, rate = match.groups()
+        parse_rate(rate)
+        schedule.append({"from": start, "to": end, "rate": rate})
+    return schedule
+
+
+def in_window(now, start, end):
+    start, end = (datetime.strptime(t, "%H:%M").time() for t in (start, end))
+    if start <= end:
+        return start <= now < end
+    return now >= start or now < end
+
+
+class TokenBucket:
+    def __init__(self, default=None, schedule=None):
+        self.lock = Lock()
+        self.default = default
+        self.schedule = schedule or list()
+        self.tokens = 0.0
+        self.last = monotonic()
+
+    def rate(self):
+        now = datetime.now().time()
+        for profile in self.schedule:
+            if in_window(now, profile.get("from"), profile.get("to")):
+                return parse_rate(profile.get("rate"))
+        return parse_rate(self.default)
+
+    def consume(self, amount):
+        rate = self.rate()
+        if not rate:
+            return
+        with self.lock:
+            now = monotonic()
+            self.tokens = min(rate, self.tokens + (now - self.last) * rate)
+            self.last = now
+            self.tokens -= amount
+            wait = -self.tokens / rate if self.tokens < 0 else 0
+        if wait:
+            sleep(wait)
+
+
+class Meter:
+    def __init__(self, window=5):
+        self.lock = Lock()
+        self.window = window
+        self.total = 0
+        self.start = None
+        self.samples = deque()
+
+    def add(self, amount):
+        now = monotonic()
+        with self.lock:
+            self.start = self.start or now
+            self.total += amount
+            self.samples.append((now, amount))
+            while self.samples and self.samples[0][0] < now - self.window:
+                self.samples.popleft()
+
+    def current(self):
+        now = monotonic()
+        with self.lock:
+            recent = sum(n for t, n in self.samples if t >= now - self.window)
+            return recent / min(self.window, max(now - (self.start or now), 1e-3))
+
+    def average(self):
+        with self.lock:
+            if not self.start:
+                return 0.0
+            return self.total / max(monotonic() - self.start, 1e-3)
+
+
+BUCKET = TokenBucket()
+METER = Meter()
+
+
+def configure(default=None, schedule=None):
+    parse_rate(default)
+    for profile in schedule or list():
+        try:
+            in_window(datetime.now().time(), profile.get("from"), profile.get("to"))
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid profile: {profile}")
+        parse_rate(profile.get("rate"))
+    BUCKET.default = default
+    BUCKET.schedule = schedule or list()
+
+
+def throttle(amount, phase="download"):
+    METRICS.add_bytes(phase, amount)
+    METER.add(amount)
+    BUCKET.consume(amount)
+
+
+def youtube_dl_hook():
+    downloaded = dict()
+
+    def hook(status):
+        current = status.get("downloaded_bytes") or 0
+        previous = downloaded.get(status.get("filename"), 0)
+        downloaded[status.get("filename")] = current
+        if current > previous:
+            throttle(current - previous)
+
+    return hook
+
+
+def throughput():
+    return f"{format_rate(METER.current())} (avg {format_rate(METER.average())})"
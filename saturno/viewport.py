@@ -0,0 +1,42 @@
+from shutil import get_terminal_size
+from sys import stdout
+
+
+class Viewport:
+    def __init__(self, reserved=4, minimum=5):
+        self.reserved = reserved
+        self.minimum = minimum
+        self.drawn = list()
+        self.offset = 0
+
+    def height(self):
+        return max(self.minimum, get_terminal_size().lines - self.reserved)
+
+    def window(self, index, total):
+        height = self.height()
+        if index < self.offset:
+            self.offset = index
+        elif index >= self.offset + height:
+            self.offset = index - height + 1
+        self.offset = max(0, min(self.offset, total - height))
+        return range(self.offset, min(total, self.offset + height))
+
+    def draw(self, lines):
+        out = [f"\x1b[{len(self.drawn)}F"] if self.drawn else []
+        for i, line in enumerate(lines):
+            if i < len(self.drawn) and self.drawn[i] == line:
+                out.append("\x1b[1E")
+            else:
+                out.append(f"\x1b[2K{line}\n")
+        leftover = len(self.drawn) - len(lines)
+        if leftover > 0:
+            out.append("\x1b[J")
+        stdout.write("".join(out))
+        stdout.flush()
+        self.drawn = list(lines)
+
+    def clear(self):
+        if self.drawn:
+            stdout.write(f"\x1b[{len(self.drawn)}F\x1b[J")
+            stdout.flush()
+        self.drawn = list()
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+from os import path
+from statistics import median
+from threading import Lock
+from time import time
+
+from saturno.config import CACHE_DIR
+from saturno.storage import load_json, save_json
+
+DAY = 24 * 3600
+WEEK = 7 * DAY
+SETTINGS = {"interval": 1800, "min-interval": 600, "max-interval": DAY, "idle": 2}
+
+
+class WatchState:
+    def __init__(self, filename):
+        self.filename = filename
+        self.lock = Lock()
+        self.state = load_json(filename, dict())
+
+    def save(self):
+        save_json(self.filename, self.state)
+
+    def record(self, key, new_episodes):
+        now = time()
+        with self.lock:
+            history = self.state.setdefault(key, {"first-seen": now, "arrivals": []})
+            if new_episodes:
+                history["arrivals"] = (history.get("arrivals") + [now])[-20:]
+            history["last-check"] = now
+            self.save()
+            return next_interval(history, now)
+
+
+def clamp(value):
+    return max(SETTINGS.get("min-interval"), min(SETTINGS.get("max-interval"), value))
+
+
+def next_interval(history, now):
+    arrivals = history.get("arrivals")
+    interval = SETTINGS.get("interval")
+    if len(arrivals) >= 2:
+        interval = median(b - a for a, b in zip(arrivals, arrivals[1:])) / 4
+    last_new = arrivals[-1] if arrivals else history.get("first-seen", now)
+    idle_weeks = int((now - last_new) // WEEK)
+    if idle_weeks >= SETTINGS.get("idle"):
+        interval *= 2 ** (idle_weeks - SETTINGS.get("idle") + 1)
+    return clamp(interval)
+
+
+def configure(interval=None, min_interval=None, max_interval=None, idle=None):
+    new = {
+        "interval": interval,
+        "min-interval": min_interval,
+        "max-interval": max_interval,
+        "idle": idle,
+    }
+    SETTINGS.update({k: v for k, v in new.items() if v is not None})
+
+
+def watch(get_anime_list, check, on_error=None, sync_every=300):
+    from apscheduler.executors.pool import ThreadPoolExecutor
+    from apscheduler.schedulers.blocking import BlockingScheduler
+
+    state = WatchState(path.join(CACHE_DIR, "watch.json"))
+    scheduler = BlockingScheduler(
+        executors={"default": ThreadPoolExecutor(1), "sync": ThreadPoolExecutor(1)},
+        job_defaults={"misfire_grace_time": None, "coalesce": True},
+    )
+    running = set()
+
+    def run(anime):
+        key = anime.get("folder")
+        running.add(key)
+        try:
+            interval = state.record(key, check(anime))
+        except Exception as error:
+            interval = SETTINGS.get("min-interval")
+            if on_error:
+                on_error(anime, error)
+        schedule(anime, interval)
+        running.discard(key)
+
+    def schedule(anime, interval):
+        scheduler.add_job(
+            run,
+            "date",
+            args=(anime,),
+            id=anime.get("folder"),
+            run_date=datetime.now() + timedelta(seconds=interval),
+            replace_existing=True,
+        )
+
+    def sync():
+        try:
+            anime_list = get_anime_list()
+        except Exception as error:
+            if on_error:
+                on_error(None, error)
+            return
+        folders = {anime.get("folder") for anime in anime_list}
+        for job in scheduler.get_jobs():
+            if job.id != "sync" and job.id not in folders:
+                job.remove()
+        for anime in anime_list:
+            if anime.get("folder") in running:
+                continue
+            job = scheduler.get_job(anime.get("folder"))
+            if job is None or job.args[0] != anime:
+                schedule(anime, 0)
+
+    scheduler.add_job(
+        sync, "interval", seconds=sync_every, id="sync", executor="sync"
+    )
+    sync()
+    try:
+        scheduler.start()
+    except (KeyboardInterrupt, SystemExit):
+        pass
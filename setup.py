@@ -22,6 +22,7 @@ setuptools.setup(
         "argparse",
         "python-telegram-bot",
         "youtube-dl",
+        "apscheduler",
     ],
     classifiers=[
         "Programming Language :: Python :: 3.8",
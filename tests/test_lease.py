@@ -0,0 +1,59 @@
+from multiprocessing import get_context
+from os import listdir
+from time import sleep
+
+from saturno.lease import SETTINGS, LeaseStore
+
+KEYS = [f"folder|1|{episode}" for episode in range(1, 41)]
+
+
+def claim_all(directory, node):
+    store = LeaseStore(directory, node)
+    claimed = list()
+    for key in KEYS:
+        if store.acquire(key):
+            claimed.append(key)
+            sleep(0.01)
+    return claimed
+
+
+def test_processes_split_work(tmp_path):
+    with get_context("spawn").Pool(2) as pool:
+        first, second = pool.starmap(
+            claim_all, [(str(tmp_path), "node-a"), (str(tmp_path), "node-b")]
+        )
+    assert not set(first) & set(second)
+    assert sorted(first + second) == sorted(KEYS)
+
+
+def test_expired_lease_is_reclaimed(tmp_path, monkeypatch):
+    monkeypatch.setitem(SETTINGS, "ttl", 0.5)
+    crashed = LeaseStore(str(tmp_path), "crashed")
+    other = LeaseStore(str(tmp_path), "other")
+    assert crashed.acquire("folder|1|1")
+    crashed.stop.set()
+    assert not other.acquire("folder|1|1")
+    sleep(0.6)
+    assert other.acquire("folder|1|1")
+    assert other.owner(other.filename("folder|1|1")) == "other"
+    leftover = [name for name in listdir(tmp_path) if not name.startswith(".clock")]
+    assert leftover == ["folder%7C1%7C1.lease"]
+
+
+def test_release_keeps_foreign_lease(tmp_path):
+    owner = LeaseStore(str(tmp_path), "owner")
+    other = LeaseStore(str(tmp_path), "other")
+    assert owner.acquire("folder|1|2")
+    other.release("folder|1|2")
+    assert not other.acquire("folder|1|2")
+    owner.release("folder|1|2")
+    assert other.acquire("folder|1|2")
+
+
+def test_expiry_uses_storage_clock(tmp_path, monkeypatch):
+    monkeypatch.setattr("saturno.lease.time", lambda: 10**10)
+    owner = LeaseStore(str(tmp_path), "owner")
+    other = LeaseStore(str(tmp_path), "other")
+    assert owner.acquire("folder|1|3")
+    owner.stop.set()
+    assert not other.acquire("folder|1|3")